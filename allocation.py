@@ -0,0 +1,174 @@
+"""Batch allocation of soon-to-expire listings to receivers.
+
+Takes every unclaimed listing expiring within a horizon and every receiver,
+and proposes one Pending claim per listing in a single pass:
+
+* listings are served in order of value, Quantity / (1 + days_left): the
+  quantity that would go to waste, discounted by the later batches a
+  listing still has before it expires. With room for one listing, a
+  100-unit listing expiring tomorrow (value 50) wins over a 1-unit one
+  expiring today (value 1). Every listing takes one receiver slot whatever
+  its quantity, so the listings that can be placed together form a matroid
+  (a total slot count, or one per city without cross-city receivers) and
+  serving them greedily by value places the largest total value possible;
+* each receiver's cost is computed once, vectorized, from its claim history
+  (smoothed completion rate from receiver_claim_stats) plus a load term
+  that spreads listings across receivers;
+* a same-city receiver (receivers.City == food_listings.Location) is
+  preferred; other cities are used only when allowed, at city_penalty.
+
+Receivers are kept in per-city heaps plus one global heap with lazy
+invalidation, so the whole batch costs O((L + R) log R) instead of an
+L x R cost matrix.
+"""
+import heapq
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+# ====== Allocation defaults ======
+# value = Quantity / (1 + days_left / URGENCY_DAYS)
+URGENCY_DAYS = 1.0
+HORIZON_DAYS = 3
+MAX_PER_RECEIVER = 5
+HISTORY_WEIGHT = 1.0
+LOAD_WEIGHT = 0.2
+CITY_PENALTY = 2.0
+
+candidate_listings_sql = """
+SELECT f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date, f.Location
+FROM food_listings f
+WHERE f.Expiry_Date BETWEEN ? AND ?
+  AND NOT EXISTS (SELECT 1 FROM claims c
+                  WHERE c.Food_ID = f.Food_ID AND c.Status IN ('Pending', 'Completed'));
+"""
+
+candidate_receivers_sql = """
+SELECT r.Receiver_ID, r.Name, r.City,
+       COALESCE(s.total_claims, 0) AS total_claims,
+       COALESCE(s.completed_claims, 0) AS completed_claims
+FROM receivers r
+LEFT JOIN receiver_claim_stats s ON s.Receiver_ID = r.Receiver_ID;
+"""
+
+insert_claim_sql = "INSERT INTO claims (Food_ID, Receiver_ID, Status, Timestamp) VALUES (?,?,'Pending',?)"
+
+
+def candidate_params(horizon_days=HORIZON_DAYS, today=None):
+    """Parameters for candidate_listings_sql: [today, today + horizon]"""
+    today = today or date.today()
+    return [today.isoformat(), (today + timedelta(days=horizon_days)).isoformat()]
+
+
+def receiver_costs(receivers, history_weight=HISTORY_WEIGHT):
+    """Base cost per receiver: lower for receivers that complete their claims"""
+    total = receivers["total_claims"].to_numpy(dtype=float)
+    completed = receivers["completed_claims"].to_numpy(dtype=float)
+    reliability = (completed + 1) / (total + 2)  # Laplace-smoothed completion rate
+    return -history_weight * reliability
+
+
+def listing_values(listings, urgency_days=URGENCY_DAYS):
+    """Allocation value per listing: quantity, discounted for the days left to expiry"""
+    days_left = listings["days_left"].to_numpy(dtype=float).clip(min=0)
+    return listings["Quantity"].to_numpy(dtype=float) / (1 + days_left / urgency_days)
+
+
+def _pop_valid(heap, assigned, capacity):
+    """Drop stale / full entries and return the best live (cost, idx) or None"""
+    while heap:
+        cost, idx, version = heap[0]
+        if version == assigned[idx] and assigned[idx] < capacity:
+            return cost, idx
+        heapq.heappop(heap)
+    return None
+
+
+def allocate(listings, receivers, today=None, max_per_receiver=MAX_PER_RECEIVER,
+             history_weight=HISTORY_WEIGHT, load_weight=LOAD_WEIGHT,
+             city_penalty=CITY_PENALTY, allow_cross_city=True, urgency_days=URGENCY_DAYS):
+    """Return one proposed (Food_ID, Receiver_ID) row per allocated listing.
+
+    The result has the listing and receiver details plus value, same_city
+    and cost columns; listings that could not be placed are left out.
+    """
+    columns = ["Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Location", "days_left", "value",
+               "Receiver_ID", "Receiver_Name", "Receiver_City", "same_city", "cost"]
+    if listings.empty or receivers.empty or max_per_receiver < 1:
+        return pd.DataFrame(columns=columns)
+
+    today = pd.Timestamp(today or date.today()).normalize()
+    listings = listings.assign(
+        days_left=(pd.to_datetime(listings["Expiry_Date"], format="%Y-%m-%d") - today).dt.days
+    )
+    # Highest value first (fewer days left breaks ties); the greedy order that minimizes waste
+    listings = listings.assign(value=listing_values(listings, urgency_days)).sort_values(
+        ["value", "days_left"], ascending=[False, True], kind="stable")
+
+    base = receiver_costs(receivers, history_weight)
+    cities = receivers["City"].to_numpy()
+    assigned = np.zeros(len(receivers), dtype=np.int64)
+
+    city_heaps = {}
+    global_heap = []
+    for idx, (cost, city) in enumerate(zip(base, cities)):
+        entry = (cost, idx, 0)
+        city_heaps.setdefault(city, []).append(entry)
+        global_heap.append(entry)
+    for heap in city_heaps.values():
+        heapq.heapify(heap)
+    heapq.heapify(global_heap)
+
+    picks = []
+    for pos, location in enumerate(listings["Location"].to_numpy()):
+        local = _pop_valid(city_heaps.get(location, []), assigned, max_per_receiver)
+        best = local
+        if allow_cross_city:
+            remote = _pop_valid(global_heap, assigned, max_per_receiver)
+            if remote is not None and cities[remote[1]] != location:
+                remote = (remote[0] + city_penalty, remote[1])
+            if best is None or (remote is not None and remote[0] < best[0]):
+                best = remote
+        if best is None:
+            continue
+
+        cost, idx = best
+        assigned[idx] += 1
+        picks.append((pos, idx, cost))
+        if assigned[idx] < max_per_receiver:
+            entry = (base[idx] + load_weight * assigned[idx], idx, assigned[idx])
+            heapq.heappush(city_heaps[cities[idx]], entry)
+            heapq.heappush(global_heap, entry)
+
+    if not picks:
+        return pd.DataFrame(columns=columns)
+    pos, idx, cost = map(np.asarray, zip(*picks))
+    chosen = listings.iloc[pos].reset_index(drop=True)
+    matched = receivers.iloc[idx].reset_index(drop=True)
+    return chosen.assign(
+        Receiver_ID=matched["Receiver_ID"].to_numpy(),
+        Receiver_Name=matched["Name"].to_numpy(),
+        Receiver_City=matched["City"].to_numpy(),
+        same_city=chosen["Location"].to_numpy() == matched["City"].to_numpy(),
+        cost=cost,
+    )[columns]
+
+
+def allocation_summary(listings, proposals):
+    """Allocated vs. wasted (unallocated) listings and quantity"""
+    total_qty = int(listings["Quantity"].sum()) if not listings.empty else 0
+    allocated_qty = int(proposals["Quantity"].sum()) if not proposals.empty else 0
+    return {
+        "listings": len(listings),
+        "allocated": len(proposals),
+        "same_city": int(proposals["same_city"].sum()) if not proposals.empty else 0,
+        "allocated_quantity": allocated_qty,
+        "unallocated_quantity": total_qty - allocated_qty,
+    }
+
+
+def proposal_rows(proposals, timestamp):
+    """Parameter rows for insert_claim_sql"""
+    return [(int(food_id), int(receiver_id), timestamp)
+            for food_id, receiver_id in zip(proposals["Food_ID"], proposals["Receiver_ID"])]
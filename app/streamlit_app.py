@@ -1,59 +1,223 @@
-import sqlite3
-import pandas as pd
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from functools import partial
+
 import streamlit as st
-import altair as alt
-from datetime import datetime, timedelta
 
-import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from load_csv_to_sqlite import build_db
+from startup import DatabaseBootstrap
 
-DB_FILE = build_db()  # ensures DB exists before connecting
+# ---------------- Startup ----------------
+st.set_page_config(page_title="Food Wastage Management", layout="wide")
+st.title("🥗 Food Wastage Management - Starter App")
 
+@st.cache_resource
+def get_bootstrap():
+    """Schema check (and build/migration if needed) once per server process, off the script thread"""
+    return DatabaseBootstrap().start()
+
+bootstrap = get_bootstrap()
+if not bootstrap.wait(timeout=0.2):
+    with st.spinner("Preparing the database…"):
+        bootstrap.wait()
+if bootstrap.error:
+    get_bootstrap.clear()  # don't cache the failure: the next rerun tries again
+    st.error(f"Database setup failed: {bootstrap.error}")
+    st.stop()
+DB_FILE = bootstrap.db_file
+
+# Imported after the first paint: pandas and everything built on it. The
+# bootstrap thread has already loaded pandas by the time we get here.
+import pandas as pd
 
+from expiry import classify_expiry, expiry_row_styles
+from db_pool import ConnectionPool
+from query_cache import QueryCache
+from pagination import KeysetPager, PAGE_SIZES
+from queries import (query_map, QUICK_ANALYTICS, LISTING_COLUMNS, LISTING_SORT_KEYS,
+                     LISTING_FILTER_COLUMNS, CONTACT_COLUMNS, CONTACT_SORT_KEYS,
+                     CLAIM_SERIES_GRANULARITIES, claim_series_query, CITY_QUERIES, DEFAULT_REPORT_CITY)
+from profiling import QueryProfiler
+from snapshot import ColumnarSnapshot, SNAPSHOT_QUICK_ANALYTICS, SNAPSHOT_QUERIES
+from bulk_ops import (LISTING_INPUT_COLUMNS, insert_listing_sql, update_claim_status_sql,
+                      listing_rows, listing_filter_clause)
+from allocation import (allocate, allocation_summary, proposal_rows, candidate_params,
+                        candidate_listings_sql, candidate_receivers_sql, insert_claim_sql,
+                        HORIZON_DAYS, MAX_PER_RECEIVER)
+from search import search, SEARCH_SQL, SEARCH_LIMIT
+from geo import (receiver_location_sql, cities_in_box_sql, nearby_listings_sql, box_params, cities_within,
+                 city_list_param, rank_nearby, NEARBY_ORDERS, DEFAULT_RADIUS_KM)
+from safe_sql import run_readonly_query, QueryTimeout, DEFAULT_TIMEOUT_S, DEFAULT_MAX_ROWS
+from export_data import export_db, available_formats, file_stem, EXPORT_FORMATS
+from expiry_watch import ExpiryWatch, recent_alerts_sql
+from report_runner import run_reports, report_tasks, report_timings, report_bundle, MAX_WORKERS
 
-DB_FILE = "food_wastage.db"
+# ---------------- Database Connection ----------------
+@st.cache_resource
+def get_pool():
+    """Shared by all sessions: pooled read-only connections + one writer"""
+    return ConnectionPool(DB_FILE)
 
+@st.cache_resource
+def get_query_cache():
+    """Result cache shared by all sessions, invalidated by run_execute"""
+    return QueryCache()
 
-import os
-from load_csv_to_sqlite import build_db
+@st.cache_resource
+def get_profiler():
+    """Per-statement timings; FOOD_WASTAGE_TRACE=<file> also writes a JSON-lines trace"""
+    return QueryProfiler(trace_path=os.environ.get("FOOD_WASTAGE_TRACE"))
 
-if not os.path.exists(DB_FILE):
-    build_db()
+@st.cache_resource
+def get_snapshot():
+    """Columnar copies of the tables, refreshed when run_execute bumps their versions"""
+    return ColumnarSnapshot(get_pool(), versions=get_query_cache().versions)
 
-# ---------------- Database Connection ----------------
 @st.cache_resource
-def get_connection():
-    return sqlite3.connect(DB_FILE, check_same_thread=False)
-
-@st.cache_data
-def load_filters(_con):
-    cities = pd.read_sql_query("SELECT DISTINCT City FROM providers ORDER BY City;", _con)["City"].tolist()
-    provider_types = pd.read_sql_query("SELECT DISTINCT Provider_Type FROM food_listings ORDER BY Provider_Type;", _con)["Provider_Type"].tolist()
-    food_types = pd.read_sql_query("SELECT DISTINCT Food_Type FROM food_listings ORDER BY Food_Type;", _con)["Food_Type"].tolist()
-    meal_types = pd.read_sql_query("SELECT DISTINCT Meal_Type FROM food_listings ORDER BY Meal_Type;", _con)["Meal_Type"].tolist()
+def get_expiry_watch():
+    """Expiry alert worker for the whole server process; keeps running with no session open"""
+    return ExpiryWatch(get_pool(), invalidate=get_query_cache().bump).start()
+
+def load_filters(pool):
+    cities = run_query(pool, "SELECT DISTINCT City FROM providers ORDER BY City;")["City"].tolist()
+    provider_types = run_query(pool, "SELECT DISTINCT Provider_Type FROM food_listings ORDER BY Provider_Type;")["Provider_Type"].tolist()
+    food_types = run_query(pool, "SELECT DISTINCT Food_Type FROM food_listings ORDER BY Food_Type;")["Food_Type"].tolist()
+    meal_types = run_query(pool, "SELECT DISTINCT Meal_Type FROM food_listings ORDER BY Meal_Type;")["Meal_Type"].tolist()
     return cities, provider_types, food_types, meal_types
 
-def run_query(con, query, params=None):
+def run_query(pool, query, params=None):
+    """Cached SELECT; the returned DataFrame is shared, so don't mutate it"""
     if params is None:
         params = []
-    return pd.read_sql_query(query, con, params=params)
 
-def run_execute(con, query, params=None):
-    """For INSERT, UPDATE, DELETE"""
+    def load():
+        with pool.reader() as con:
+            return get_profiler().profile(
+                con, query, params, lambda c: pd.read_sql_query(query, c, params=params))
+
+    return get_query_cache().cached(query, params, load)
+
+def run_analytics(pool, name, query, snapshot_queries, params=None):
+    """Run a named analytics query on the columnar snapshot when enabled, else on SQLite"""
+    fn = snapshot_queries.get(name)
+    if not (use_snapshot and fn) or params:
+        return run_query(pool, query, params)
+    start = time.perf_counter()
+    result = fn(get_snapshot())
+    get_profiler().record(f"[snapshot] {name}", "snapshot", time.perf_counter() - start, len(result), 0)
+    return result
+
+def run_search(pool, text, entity=None):
+    """Cached, ranked full-text search over providers / receivers / listings"""
+    def load():
+        with pool.reader() as con:
+            return get_profiler().profile(con, SEARCH_SQL, ["", None, None, SEARCH_LIMIT],
+                                          lambda c: search(c, text, entity))
+
+    return get_query_cache().cached(SEARCH_SQL, [text, entity, SEARCH_LIMIT], load)
+
+def entity_picker(pool, entity, key, noun):
+    """Search box + ranked matches outside a form; returns the picked ID as text, or "" """
+    text = st.text_input(f"Find {noun} by name or city", key=f"{key}_find")
+    if not text.strip():
+        return ""
+    matches = run_search(pool, text, entity)
+    if matches.empty:
+        st.caption("No matches")
+        return ""
+    labels = {row.ID: f"{row.Name} · {row.City} (#{row.ID})" for row in matches.itertuples()}
+    return str(st.selectbox(f"Matching {noun}s", list(labels), format_func=labels.get, key=f"{key}_pick"))
+
+def nearby_listings(pool, receiver_id, radius_km, order):
+    """Open listings within radius_km of a receiver's city, ranked by NEARBY_ORDERS[order].
+
+    Returns (receiver city, listings); listings is None when the city has no coordinates.
+    """
+    located = run_query(pool, receiver_location_sql, [int(receiver_id)])
+    if located.empty:
+        return None, None
+    city, lat, lon = located.iloc[0]
+    if pd.isnull(lat):
+        return city, None
+    candidates = run_query(pool, cities_in_box_sql, box_params(lat, lon, radius_km))
+    near = cities_within(candidates, lat, lon, radius_km)
+    listings = run_query(pool, nearby_listings_sql, [city_list_param(near["City"]), date.today().isoformat()])
+    return city, rank_nearby(listings, near, order)
+
+def run_execute(pool, query, params=None):
+    """For INSERT, UPDATE, DELETE; returns the number of rows affected"""
     if params is None:
         params = []
-    cur = con.cursor()
-    cur.execute(query, params)
-    con.commit()
+    with pool.writer() as con:
+        cur = get_profiler().profile(con, query, params, lambda c: c.execute(query, params), kind="write")
+    get_query_cache().invalidate_for(query)
+    get_expiry_watch().notify()
+    return cur.rowcount
+
+def run_execute_many(pool, query, rows):
+    """One statement for many parameter rows in a single all-or-nothing transaction.
+
+    Returns the number of rows affected; on any error nothing is written.
+    """
+    if not rows:
+        return 0
+    with pool.writer() as con:
+        cur = get_profiler().profile(con, query, rows[0], lambda c: c.executemany(query, rows), kind="write")
+    get_query_cache().invalidate_for(query)
+    get_expiry_watch().notify()
+    return cur.rowcount
+
+def export_file(db_file, sql, params, fmt, timeout_s):
+    """Stream the result of sql through a temporary file; returns the file's bytes.
+
+    Streamlit serves a download from memory, so the finished file is held once,
+    but the rows never are.
+    """
+    with tempfile.TemporaryFile() as out:
+        export_db(db_file, sql, out, fmt, params, timeout_s=timeout_s)
+        out.seek(0)
+        return out.read()
+
+def export_buttons(pool, sql, params, name, key, timeout_s=None):
+    """One download button per export format for the full result of sql, not just the rows on screen.
+
+    The export runs only when a button is clicked, on its own read-only connection.
+    """
+    formats = available_formats()
+    for col, fmt in zip(st.columns([1] * len(formats) + [6]), formats):
+        ext, mime, _ = EXPORT_FORMATS[fmt]
+        col.download_button(f"⬇ {fmt.upper()}", partial(export_file, pool.db_file, sql, params, fmt, timeout_s),
+                            file_name=file_stem(name) + ext, mime=mime, key=f"{key}_export_{fmt}", on_click="ignore")
+
+def paginated(pool, pager, key):
+    """Page size / jump-to-page controls; returns the selected page as a DataFrame"""
+    total = int(run_query(pool, *pager.count_query())["total"][0])
+    col_size, col_page, col_info = st.columns([1, 1, 2])
+    page_size = col_size.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+    n_pages = max(1, -(-total // page_size))
+    # Keyed on the filters so a new filter combination starts back at page 1
+    filter_key = "_".join(str(value) for _, value in pager.filters)
+    page = col_page.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1,
+                                 key=f"{key}_page_{filter_key}_{page_size}")
+
+    start_key = None
+    if page > 1:
+        boundaries = run_query(pool, *pager.boundaries_query(page_size))
+        start_key = boundaries.iloc[min(page, len(boundaries)) - 1].tolist()
+    page_df = run_query(pool, *pager.page_query(start_key, page_size))
+
+    first = (page - 1) * page_size + 1 if total else 0
+    col_info.caption(f"Rows {first}–{first + len(page_df) - 1 if total else 0} of {total}")
+    return page_df
 
 # ---------------- UI ----------------
-st.set_page_config(page_title="Food Wastage Management", layout="wide")
-st.title("🥗 Food Wastage Management - Starter App")
-
-con = get_connection()
-cities, provider_types, food_types, meal_types = load_filters(con)
+pool = get_pool()
+expiry_watch = get_expiry_watch()
+cities, provider_types, food_types, meal_types = load_filters(pool)
 
 # ---------------- Sidebar Filters ----------------
 with st.sidebar:
@@ -63,186 +227,191 @@ with st.sidebar:
     ftype = st.selectbox("Food Type", ["All"] + food_types)
     mtype = st.selectbox("Meal Type", ["All"] + meal_types)
 
+    # Admin mode is only offered when FOOD_WASTAGE_ADMIN_TOKEN is set
+    admin_token = os.environ.get("FOOD_WASTAGE_ADMIN_TOKEN")
+    is_admin = bool(admin_token) and st.text_input("Admin token", type="password") == admin_token
+
+    use_snapshot = st.checkbox("Columnar analytics engine", key="use_snapshot",
+                               help="Run Quick Analytics and the predefined aggregates on an in-memory "
+                                    "columnar copy of the tables instead of SQLite")
+
+# ---------------- Search ----------------
+st.subheader("🔎 Search")
+search_text = st.text_input("Providers, receivers and food listings by name, address or city",
+                            key="global_search", placeholder="e.g. bread, Jon Smith, New Carol")
+if search_text.strip():
+    search_results = run_search(pool, search_text)
+    if search_results.empty:
+        st.info("No matches.")
+    else:
+        st.dataframe(search_results.drop(columns="rank"), use_container_width=True, hide_index=True)
+
 # ---------------- Filtered Food Listings ----------------
 st.subheader("Available Food Listings")
-query = """
-SELECT Food_ID, Food_Name, Quantity, Expiry_Date, Provider_ID, Provider_Type, Location, Food_Type, Meal_Type
-FROM food_listings WHERE 1=1
-"""
-params = []
-if city != "All":
-    query += " AND Location = ?"
-    params.append(city)
-if ptype != "All":
-    query += " AND Provider_Type = ?"
-    params.append(ptype)
-if ftype != "All":
-    query += " AND Food_Type = ?"
-    params.append(ftype)
-if mtype != "All":
-    query += " AND Meal_Type = ?"
-    params.append(mtype)
-
-query += " ORDER BY date(Expiry_Date) ASC, Quantity DESC"
-listings_df = run_query(con, query, params)
+listing_filters = [(col, value) for col, value in zip(LISTING_FILTER_COLUMNS, [city, ptype, ftype, mtype])
+                   if value != "All"]
+listings_pager = KeysetPager("food_listings", LISTING_COLUMNS, LISTING_SORT_KEYS, listing_filters)
+listings_df = paginated(pool, listings_pager, "listings")
 
 # --- Expiry Alert ---
-# --- Expiry Alert ---
-today = datetime.now().date()
-soon_limit = today + timedelta(days=2)
-
-def get_expiry_status(exp_date_str):
-    try:
-        exp_date = pd.to_datetime(exp_date_str).date()
-        if exp_date == today:
-            return ("⚠ Expiring Today", "#ff4d4d")
-        elif today < exp_date <= soon_limit:
-            return ("⚠ Expiring Soon", "#ffcccc")
+listings_df = classify_expiry(listings_df)
+st.dataframe(listings_df.style.apply(expiry_row_styles, axis=None), use_container_width=True)
+export_buttons(pool, *listings_pager.all_query(), "food_listings", "listings")
+
+with st.expander("📍 Open listings near a receiver"):
+    near_receiver = entity_picker(pool, "receiver", "near", "receiver")
+    col_radius, col_order = st.columns(2)
+    near_radius = col_radius.slider("Within (km)", 1, 200, DEFAULT_RADIUS_KM, key="near_radius")
+    near_order = col_order.radio("Rank by", list(NEARBY_ORDERS), horizontal=True, key="near_order")
+    if near_receiver:
+        near_city, near_df = nearby_listings(pool, near_receiver, near_radius, near_order)
+        if near_df is None:
+            st.warning(f"No coordinates for {near_city}; add it to data/city_coordinates.csv.")
         else:
-            return ("", "")
-    except:
-        return ("", "")
+            st.caption(f"{len(near_df)} open listings within {near_radius} km of {near_city}")
+            st.dataframe(near_df, use_container_width=True, hide_index=True)
 
-# safely split into two new columns
-expiry_info = listings_df["Expiry_Date"].apply(get_expiry_status)
-listings_df["Expiry Alert"] = expiry_info.apply(lambda x: x[0])
-listings_df["Color"] = expiry_info.apply(lambda x: x[1])
-
-def highlight_row(row):
-    if row["Color"]:
-        return ["background-color: " + row["Color"]] * len(row)
-    return [""] * len(row)
-
-st.dataframe(listings_df.style.apply(highlight_row, axis=1), use_container_width=True)
+with st.expander("🔔 Expiry alerts sent to receivers"):
+    watch_stats = expiry_watch.stats()
+    st.caption(f"Watching {watch_stats['tracked_listings']} unclaimed listings; receivers in the same city "
+               f"are alerted with {' and '.join(map(str, watch_stats['thresholds_days']))} days left")
+    alerts_df = run_query(pool, recent_alerts_sql, [100])
+    if alerts_df.empty:
+        st.info("No alerts yet.")
+    else:
+        st.dataframe(alerts_df, use_container_width=True, hide_index=True)
 
 
 
 # ---------------- Provider Contacts ----------------
 st.subheader("Provider Contacts")
-contact_query = "SELECT Name, Type, Address, City, Contact FROM providers"
-contact_params = []
-if city != "All":
-    contact_query += " WHERE City = ?"
-    contact_params.append(city)
-contact_df = run_query(con, contact_query, contact_params)
+contacts_pager = KeysetPager("providers", CONTACT_COLUMNS, CONTACT_SORT_KEYS,
+                             [("City", city)] if city != "All" else [])
+contact_df = paginated(pool, contacts_pager, "contacts")
 st.dataframe(contact_df, use_container_width=True)
+export_buttons(pool, *contacts_pager.all_query(), "provider_contacts", "contacts")
 
 # ---------------- Quick Analytics ----------------
 st.subheader("Quick Analytics")
 col1, col2, col3 = st.columns(3)
 with col1:
-    total_qty = run_query(con, "SELECT SUM(Quantity) as total FROM food_listings WHERE date(Expiry_Date) >= date('now');")
+    total_qty = run_analytics(pool, "Total Quantity Available", QUICK_ANALYTICS["Total Quantity Available"],
+                              SNAPSHOT_QUICK_ANALYTICS)
     st.metric("Total Quantity Available", int(total_qty['total'][0]) if pd.notnull(total_qty['total'][0]) else 0)
 with col2:
-    status_counts = run_query(con, "SELECT Status, COUNT(*) as cnt FROM claims GROUP BY Status;")
+    status_counts = run_analytics(pool, "Claim Status Counts", QUICK_ANALYTICS["Claim Status Counts"],
+                                  SNAPSHOT_QUICK_ANALYTICS)
     st.dataframe(status_counts, use_container_width=True, height=180)
 with col3:
-    top_city = run_query(con, "SELECT Location, COUNT(*) as cnt FROM food_listings GROUP BY Location ORDER BY cnt DESC LIMIT 1;")
+    top_city = run_analytics(pool, "Top City by Listings", QUICK_ANALYTICS["Top City by Listings"],
+                             SNAPSHOT_QUICK_ANALYTICS)
     if not top_city.empty:
         st.metric("Top City by Listings", f"{top_city['Location'][0]} ({top_city['cnt'][0]})")
 
+# ---------------- Claims over time ----------------
+st.subheader("📈 Claims Over Time")
+span = run_query(pool, "SELECT MIN(Bucket) AS first_day, MAX(Bucket) AS last_day FROM claim_daily_stats;")
+if pd.isnull(span["first_day"][0]):
+    st.info("No claims yet.")
+else:
+    first_day = datetime.strptime(span["first_day"][0], "%Y-%m-%d").date()
+    last_day = datetime.strptime(span["last_day"][0], "%Y-%m-%d").date()
+    col_gran, col_range, col_city, col_food = st.columns([1, 2, 1, 1])
+    granularity = col_gran.selectbox("Per", list(CLAIM_SERIES_GRANULARITIES), index=1, key="series_granularity")
+    date_range = col_range.date_input("Claims between", (first_day, last_day), key="series_range")
+    series_city = col_city.selectbox("City", ["All"] + cities, key="series_city")
+    series_food = col_food.selectbox("Food Type", ["All"] + food_types, key="series_food")
+
+    range_start, range_end = (date_range + (date_range[-1],))[:2] if date_range else (None, None)
+    series = run_query(pool, *claim_series_query(
+        granularity, range_start, range_end,
+        None if series_city == "All" else series_city,
+        None if series_food == "All" else series_food,
+    ))
+    if series.empty:
+        st.info("No claims match these filters.")
+    else:
+        series = series.set_index("Period")
+        col_claims, col_rate, col_lead = st.columns(3)
+        with col_claims:
+            st.caption("Claims (all vs. completed)")
+            st.bar_chart(series[["claims", "completed_claims"]], stack=False)
+        with col_rate:
+            st.caption("Completion rate")
+            st.line_chart(series["completion_rate"])
+        with col_lead:
+            st.caption("Avg. days left before expiry when claimed")
+            st.line_chart(series["avg_days_before_expiry"])
+
 # ---------------- Predefined Queries ----------------
 st.subheader("📊 Project Analysis Queries")
-query_map = {
-    "Providers per City":
-        "SELECT City, COUNT(*) AS provider_count FROM providers GROUP BY City ORDER BY provider_count DESC, City;",
-    "Receivers per City":
-        "SELECT City, COUNT(*) AS receiver_count FROM receivers GROUP BY City ORDER BY receiver_count DESC, City;",
-    "Top Contributing Provider Type":
-        "SELECT Provider_Type, SUM(Quantity) AS total_quantity FROM food_listings GROUP BY Provider_Type ORDER BY total_quantity DESC;",
-    "Provider Contacts by City":
-        "SELECT Name, Type, Address, City, Contact FROM providers WHERE City = 'Mumbai' ORDER BY Name;",
-    "Top Receivers by Completed Claims":
-        """SELECT r.Receiver_ID, r.Name, r.Type, r.City,
-                  COUNT(c.Claim_ID) AS total_claims,
-                  SUM(CASE WHEN c.Status='Completed' THEN 1 ELSE 0 END) AS completed_claims
-           FROM receivers r
-           JOIN claims c ON c.Receiver_ID = r.Receiver_ID
-           GROUP BY r.Receiver_ID, r.Name, r.Type, r.City
-           ORDER BY completed_claims DESC, total_claims DESC
-           LIMIT 10;""",
-    "Total Quantity Available":
-        "SELECT SUM(Quantity) AS total_available_quantity FROM food_listings WHERE date(Expiry_Date) >= date('now');",
-    "City with Most Listings":
-        "SELECT Location AS City, COUNT(*) AS listing_count FROM food_listings GROUP BY Location ORDER BY listing_count DESC, City;",
-    "Most Common Food Types":
-        "SELECT Food_Type, COUNT(*) AS items_count FROM food_listings GROUP BY Food_Type ORDER BY items_count DESC;",
-    "Claims per Food Item":
-        "SELECT Food_ID, COUNT(*) AS claim_count FROM claims GROUP BY Food_ID ORDER BY claim_count DESC, Food_ID LIMIT 20;",
-    "Provider with Most Successful Claims":
-        """SELECT p.Provider_ID, p.Name, p.Type, p.City,
-                  COUNT(c.Claim_ID) AS successful_claims
-           FROM providers p
-           JOIN food_listings f ON f.Provider_ID = p.Provider_ID
-           JOIN claims c ON c.Food_ID = f.Food_ID
-           WHERE c.Status = 'Completed'
-           GROUP BY p.Provider_ID, p.Name, p.Type, p.City
-           ORDER BY successful_claims DESC
-           LIMIT 10;""",
-    "Claim Status Distribution":
-        """SELECT Status, COUNT(*) AS count,
-                  ROUND(100.0 * COUNT(*) / (SELECT COUNT(*) FROM claims), 2) AS percentage
-           FROM claims
-           GROUP BY Status
-           ORDER BY count DESC;""",
-    "Average Quantity Claimed per Receiver":
-        """SELECT r.Receiver_ID, r.Name,
-                  ROUND(AVG(f.Quantity), 2) AS avg_quantity_per_claim
-           FROM claims c
-           JOIN receivers r ON r.Receiver_ID = c.Receiver_ID
-           JOIN food_listings f ON f.Food_ID = c.Food_ID
-           WHERE c.Status = 'Completed'
-           GROUP BY r.Receiver_ID, r.Name
-           ORDER BY avg_quantity_per_claim DESC
-           LIMIT 15;""",
-    "Most Claimed Meal Type":
-        """SELECT f.Meal_Type, COUNT(*) AS completed_claims
-           FROM claims c
-           JOIN food_listings f ON f.Food_ID = c.Food_ID
-           WHERE c.Status = 'Completed'
-           GROUP BY f.Meal_Type
-           ORDER BY completed_claims DESC;""",
-    "Total Quantity Donated by Provider":
-        """SELECT p.Provider_ID, p.Name, SUM(f.Quantity) AS total_quantity_donated
-           FROM providers p
-           JOIN food_listings f ON f.Provider_ID = p.Provider_ID
-           GROUP BY p.Provider_ID, p.Name
-           ORDER BY total_quantity_donated DESC
-           LIMIT 20;""",
-    "Listings Expiring Soon":
-        """SELECT Food_ID, Food_Name, Quantity, Expiry_Date, Location, Food_Type, Meal_Type
-           FROM food_listings
-           WHERE date(Expiry_Date) BETWEEN date('now') AND date('now','+2 day')
-           ORDER BY date(Expiry_Date), Quantity DESC;""",
-    "Top Cities by Completed Claims":
-        """SELECT f.Location AS City, COUNT(*) AS completed_claims
-           FROM claims c
-           JOIN food_listings f ON f.Food_ID = c.Food_ID
-           WHERE c.Status = 'Completed'
-           GROUP BY f.Location
-           ORDER BY completed_claims DESC
-           LIMIT 10;"""
-}
-
 selected_query_name = st.selectbox("Select a predefined query:", list(query_map.keys()))
+sql, sql_params = query_map[selected_query_name], []
+if selected_query_name in CITY_QUERIES:
+    report_city = st.selectbox("For city", cities, key="report_city",
+                               index=cities.index(DEFAULT_REPORT_CITY) if DEFAULT_REPORT_CITY in cities else 0)
+    sql, sql_params = CITY_QUERIES[selected_query_name], [report_city]
 if st.button("Run Selected Query", key="run_predefined_query"):
-    sql = query_map[selected_query_name]
     try:
-        result_df = run_query(con, sql)
+        result_df = run_analytics(pool, selected_query_name, sql, SNAPSHOT_QUERIES, sql_params)
         st.dataframe(result_df, use_container_width=True)
         # Optional: add charts (as in your original app)
     except Exception as e:
         st.error(f"Error: {e}")
+export_buttons(pool, sql, sql_params, " ".join([selected_query_name] + sql_params), "predefined")
+
+with st.expander("Run all reports at once"):
+    col_cities, col_workers = st.columns([3, 1])
+    report_cities = col_cities.multiselect(f"Also run {', '.join(CITY_QUERIES)} for", cities, key="report_cities")
+    report_workers = col_workers.number_input("Reports in parallel", min_value=1, max_value=16, value=MAX_WORKERS,
+                                              key="report_workers")
+    if st.button("Run All Reports", key="run_all_reports"):
+        progress = st.progress(0.0, text="Starting…")
+
+        def report_done(result, finished, total):
+            get_profiler().record(f"[report] {result.name}", "report", result.elapsed_s,
+                                  len(result.df) if result.df is not None else 0, 0)
+            progress.progress(finished / total, text=f"{finished}/{total} · {result.name}")
+
+        results, elapsed = run_reports(pool.db_file, report_tasks(report_cities), int(report_workers), report_done)
+        st.session_state["report_pack"] = (results, elapsed, report_bundle(results))
+
+    if "report_pack" in st.session_state:
+        results, elapsed, bundle = st.session_state["report_pack"]
+        failed = [r.name for r in results if r.error]
+        st.caption(f"{len(results)} reports in {elapsed:.2f}s "
+                   f"(sum of the individual report times: {sum(r.elapsed_s for r in results):.2f}s)")
+        if failed:
+            st.warning(f"Failed: {', '.join(failed)}")
+        st.dataframe(report_timings(results), use_container_width=True, hide_index=True)
+        st.download_button("⬇ All reports (zip)", bundle, file_name="reports.zip", mime="application/zip",
+                           key="report_pack_zip", on_click="ignore")
+        finished_reports = {r.name: r.df for r in results if r.df is not None}
+        if finished_reports:
+            shown_report = st.selectbox("Show report", list(finished_reports), key="report_pack_show")
+            st.dataframe(finished_reports[shown_report], use_container_width=True)
 
 # ---------------- Run Custom SQL ----------------
 st.subheader("Run Custom SQL")
 custom_sql = st.text_area("Enter SQL query:", "SELECT * FROM providers LIMIT 5;")
+col_timeout, col_rows = st.columns(2)
+sql_timeout = col_timeout.number_input("Timeout (seconds)", min_value=0.5, max_value=60.0, value=DEFAULT_TIMEOUT_S, step=0.5)
+sql_max_rows = col_rows.number_input("Max rows", min_value=1, max_value=100_000, value=DEFAULT_MAX_ROWS, step=1000)
 if st.button("Run SQL", key="run_custom_sql"):
     try:
-        res = run_query(con, custom_sql)
-        st.dataframe(res, use_container_width=True)
+        res = run_readonly_query(pool.db_file, custom_sql, timeout_s=sql_timeout, max_rows=int(sql_max_rows))
+        st.caption(f"{len(res.df)} rows in {res.elapsed_s:.3f}s")
+        if res.truncated:
+            st.warning(f"Result truncated to the first {int(sql_max_rows)} rows")
+        st.dataframe(res.df, use_container_width=True)
+        with st.expander("Query plan"):
+            st.dataframe(res.plan, use_container_width=True, hide_index=True)
+    except QueryTimeout as e:
+        st.error(f"Timed out: {e}")
     except Exception as e:
         st.error(f"Error: {e}")
+st.caption("Exports stream every row of the result (no row cap) and stop at the timeout above.")
+export_buttons(pool, custom_sql, [], "custom_query", "custom_sql", timeout_s=sql_timeout)
 
 # ---------------- CRUD Operations ----------------
 st.subheader("🛠 CRUD Operations")
@@ -252,7 +421,7 @@ crud_tab = st.tabs(["Food Listings", "Providers", "Receivers", "Claims"])
 # ---------------- Food Listings CRUD ----------------
 with crud_tab[0]:
     st.markdown("### Manage Food Listings")
-    action = st.selectbox("Select Action", ["Add", "Update", "Delete"])
+    action = st.selectbox("Select Action", ["Add", "Update", "Delete", "Bulk Add", "Bulk Delete"])
 
     if action == "Add":
         with st.form("add_food_form"):
@@ -266,31 +435,74 @@ with crud_tab[0]:
             meal_type = st.text_input("Meal Type")
             submitted = st.form_submit_button("Add Food Listing")
             if submitted:
-                run_execute(con,
+                run_execute(pool,
                             "INSERT INTO food_listings (Food_Name, Quantity, Expiry_Date, Provider_ID, Provider_Type, Location, Food_Type, Meal_Type) VALUES (?,?,?,?,?,?,?,?)",
-                            [food_name, quantity, expiry_date, provider_id, provider_type, location, food_type, meal_type])
+                            [food_name, quantity, expiry_date.isoformat(), provider_id, provider_type, location, food_type, meal_type])
                 st.success("Food Listing Added!")
 
     elif action == "Update":
+        picked = entity_picker(pool, "food", "food_update", "listing")
         with st.form("update_food_form"):
-            food_id = st.text_input("Food ID to Update")
+            food_id = st.text_input("Food ID to Update", value=picked)
             quantity = st.number_input("New Quantity", min_value=1)
             expiry_date = st.date_input("New Expiry Date")
             submitted = st.form_submit_button("Update Food Listing")
             if submitted:
-                run_execute(con,
+                run_execute(pool,
                             "UPDATE food_listings SET Quantity=?, Expiry_Date=? WHERE Food_ID=?",
-                            [quantity, expiry_date, food_id])
+                            [quantity, expiry_date.isoformat(), food_id])
                 st.success("Food Listing Updated!")
 
     elif action == "Delete":
+        picked = entity_picker(pool, "food", "food_delete", "listing")
         with st.form("delete_food_form"):
-            food_id = st.text_input("Food ID to Delete")
+            food_id = st.text_input("Food ID to Delete", value=picked)
             submitted = st.form_submit_button("Delete Food Listing")
             if submitted:
-                run_execute(con, "DELETE FROM food_listings WHERE Food_ID=?", [food_id])
+                run_execute(pool, "DELETE FROM food_listings WHERE Food_ID=?", [food_id])
                 st.success("Food Listing Deleted!")
 
+    elif action == "Bulk Add":
+        st.caption(f"Upload a CSV with columns {', '.join(LISTING_INPUT_COLUMNS)} "
+                   "or type rows into the grid. All rows are inserted in one transaction.")
+        uploaded = st.file_uploader("Listings CSV", type="csv", key="bulk_listings_csv")
+        draft = pd.DataFrame(columns=LISTING_INPUT_COLUMNS)
+        if uploaded:
+            try:
+                draft = pd.read_csv(uploaded)
+            except Exception as e:  # not a CSV, bad encoding, ragged rows...
+                st.error(f"No listings inserted: {e}")
+        edited = st.data_editor(draft, num_rows="dynamic", use_container_width=True, key="bulk_listings_grid")
+        if st.button("Insert Listings", key="bulk_listings_insert"):
+            try:
+                inserted = run_execute_many(pool, insert_listing_sql, listing_rows(edited))
+                st.success(f"{inserted} Food Listings Added!")
+            except Exception as e:
+                st.error(f"No listings inserted: {e}")
+
+    elif action == "Bulk Delete":
+        col_loc, col_food, col_meal = st.columns(3)
+        del_location = col_loc.selectbox("Location", ["Any"] + cities, key="bulk_del_location")
+        del_food = col_food.selectbox("Food Type", ["Any"] + food_types, key="bulk_del_food")
+        del_meal = col_meal.selectbox("Meal Type", ["Any"] + meal_types, key="bulk_del_meal")
+        use_expiry = st.checkbox("Only listings expiring before", key="bulk_del_use_expiry")
+        del_before = st.date_input("Expiring before", key="bulk_del_before", disabled=not use_expiry)
+
+        where, where_params = listing_filter_clause(
+            None if del_location == "Any" else del_location,
+            None if del_food == "Any" else del_food,
+            None if del_meal == "Any" else del_meal,
+            del_before if use_expiry else None,
+        )
+        if not where:
+            st.info("Pick at least one filter to bulk delete.")
+        else:
+            matching = int(run_query(pool, f"SELECT COUNT(*) AS n FROM food_listings WHERE {where};", where_params)["n"][0])
+            if st.button(f"Delete {matching} matching listings (and their claims)", key="bulk_del_go",
+                         disabled=matching == 0):
+                deleted = run_execute(pool, f"DELETE FROM food_listings WHERE {where}", where_params)
+                st.success(f"{deleted} Food Listings Deleted!")
+
 # ---------------- Providers CRUD ----------------
 with crud_tab[1]:
     st.markdown("### Manage Providers")
@@ -305,28 +517,30 @@ with crud_tab[1]:
             contact = st.text_input("Contact")
             submitted = st.form_submit_button("Add Provider")
             if submitted:
-                run_execute(con,
+                run_execute(pool,
                             "INSERT INTO providers (Name, Type, Address, City, Contact) VALUES (?,?,?,?,?)",
                             [name, type_, address, city_, contact])
                 st.success("Provider Added!")
 
     elif action == "Update":
+        picked = entity_picker(pool, "provider", "provider_update", "provider")
         with st.form("update_provider_form"):
-            provider_id = st.text_input("Provider ID to Update")
+            provider_id = st.text_input("Provider ID to Update", value=picked)
             contact = st.text_input("New Contact")
             submitted = st.form_submit_button("Update Provider")
             if submitted:
-                run_execute(con,
+                run_execute(pool,
                             "UPDATE providers SET Contact=? WHERE Provider_ID=?",
                             [contact, provider_id])
                 st.success("Provider Updated!")
 
     elif action == "Delete":
+        picked = entity_picker(pool, "provider", "provider_delete", "provider")
         with st.form("delete_provider_form"):
-            provider_id = st.text_input("Provider ID to Delete")
+            provider_id = st.text_input("Provider ID to Delete", value=picked)
             submitted = st.form_submit_button("Delete Provider")
             if submitted:
-                run_execute(con, "DELETE FROM providers WHERE Provider_ID=?", [provider_id])
+                run_execute(pool, "DELETE FROM providers WHERE Provider_ID=?", [provider_id])
                 st.success("Provider Deleted!")
 
 # ---------------- Receivers CRUD ----------------
@@ -341,45 +555,66 @@ with crud_tab[2]:
             city_ = st.text_input("City")
             submitted = st.form_submit_button("Add Receiver")
             if submitted:
-                run_execute(con,
+                run_execute(pool,
                             "INSERT INTO receivers (Name, Type, City) VALUES (?,?,?)",
                             [name, type_, city_])
                 st.success("Receiver Added!")
 
     elif action == "Update":
+        picked = entity_picker(pool, "receiver", "receiver_update", "receiver")
         with st.form("update_receiver_form"):
-            receiver_id = st.text_input("Receiver ID to Update")
+            receiver_id = st.text_input("Receiver ID to Update", value=picked)
             city_ = st.text_input("New City")
             submitted = st.form_submit_button("Update Receiver")
             if submitted:
-                run_execute(con,
+                run_execute(pool,
                             "UPDATE receivers SET City=? WHERE Receiver_ID=?",
                             [city_, receiver_id])
                 st.success("Receiver Updated!")
 
     elif action == "Delete":
+        picked = entity_picker(pool, "receiver", "receiver_delete", "receiver")
         with st.form("delete_receiver_form"):
-            receiver_id = st.text_input("Receiver ID to Delete")
+            receiver_id = st.text_input("Receiver ID to Delete", value=picked)
             submitted = st.form_submit_button("Delete Receiver")
             if submitted:
-                run_execute(con, "DELETE FROM receivers WHERE Receiver_ID=?", [receiver_id])
+                run_execute(pool, "DELETE FROM receivers WHERE Receiver_ID=?", [receiver_id])
                 st.success("Receiver Deleted!")
 
 # ---------------- Claims CRUD ----------------
 with crud_tab[3]:
     st.markdown("### Manage Claims")
-    action = st.selectbox("Select Action", ["Add", "Update", "Delete"], key="claim_action")
+    action = st.selectbox("Select Action", ["Add", "Update", "Delete", "Bulk Update Status", "Auto Allocate"],
+                          key="claim_action")
 
     if action == "Add":
+        col_food_pick, col_receiver_pick = st.columns(2)
+        with col_receiver_pick:
+            picked_receiver = entity_picker(pool, "receiver", "claim_receiver", "receiver")
+        with col_food_pick:
+            if picked_receiver and st.checkbox("Only open listings near this receiver", key="claim_nearby"):
+                radius = st.slider("Within (km)", 1, 200, DEFAULT_RADIUS_KM, key="claim_radius")
+                _, nearby = nearby_listings(pool, picked_receiver, radius, "Distance")
+                if nearby is None or nearby.empty:
+                    st.caption("No open listings nearby")
+                    picked_food = ""
+                else:
+                    labels = {row.Food_ID: f"{row.Food_Name} · {row.Location} · {row.distance_km} km · "
+                                           f"expires {row.Expiry_Date} (#{row.Food_ID})"
+                              for row in nearby.head(200).itertuples()}
+                    picked_food = str(st.selectbox("Nearby listings", list(labels), format_func=labels.get,
+                                                   key="claim_nearby_pick"))
+            else:
+                picked_food = entity_picker(pool, "food", "claim_food", "listing")
         with st.form("add_claim_form"):
-            food_id = st.text_input("Food ID")
-            receiver_id = st.text_input("Receiver ID")
+            food_id = st.text_input("Food ID", value=picked_food)
+            receiver_id = st.text_input("Receiver ID", value=picked_receiver)
             status = st.selectbox("Status", ["Pending", "Completed", "Canceled"])
             submitted = st.form_submit_button("Add Claim")
             if submitted:
-                run_execute(con,
-                            "INSERT INTO claims (Food_ID, Receiver_ID, Status) VALUES (?,?,?)",
-                            [food_id, receiver_id, status])
+                run_execute(pool,
+                            "INSERT INTO claims (Food_ID, Receiver_ID, Status, Timestamp) VALUES (?,?,?,?)",
+                            [food_id, receiver_id, status, datetime.now().strftime("%Y-%m-%d %H:%M")])
                 st.success("Claim Added!")
 
     elif action == "Update":
@@ -388,7 +623,7 @@ with crud_tab[3]:
             status = st.selectbox("New Status", ["Pending", "Completed", "Canceled"])
             submitted = st.form_submit_button("Update Claim")
             if submitted:
-                run_execute(con,
+                run_execute(pool,
                             "UPDATE claims SET Status=? WHERE Claim_ID=?",
                             [status, claim_id])
                 st.success("Claim Updated!")
@@ -398,5 +633,85 @@ with crud_tab[3]:
             claim_id = st.text_input("Claim ID to Delete")
             submitted = st.form_submit_button("Delete Claim")
             if submitted:
-                run_execute(con, "DELETE FROM claims WHERE Claim_ID=?", [claim_id])
+                run_execute(pool, "DELETE FROM claims WHERE Claim_ID=?", [claim_id])
                 st.success("Claim Deleted!")
+
+    elif action == "Bulk Update Status":
+        current_status = st.selectbox("Claims currently", ["Pending", "Completed", "Cancelled", "Canceled"],
+                                      key="bulk_claim_current")
+        candidates = run_query(pool,
+                               "SELECT Claim_ID, Food_ID, Receiver_ID, Timestamp FROM claims "
+                               "WHERE Status = ? ORDER BY Timestamp DESC LIMIT 1000;", [current_status])
+        claim_ids = st.multiselect("Claims to update", candidates["Claim_ID"].tolist(), key="bulk_claim_ids",
+                                   format_func=lambda cid: f"#{cid}")
+        select_all = st.checkbox(f"Select all {len(candidates)} listed claims", key="bulk_claim_all")
+        new_status = st.selectbox("New Status", ["Pending", "Completed", "Cancelled"], key="bulk_claim_new")
+        chosen = candidates["Claim_ID"].tolist() if select_all else claim_ids
+        if st.button(f"Update {len(chosen)} claims", key="bulk_claim_go", disabled=not chosen):
+            try:
+                updated = run_execute_many(pool, update_claim_status_sql,
+                                           [(new_status, int(cid)) for cid in chosen])
+                st.success(f"{updated} Claims Updated!")
+            except Exception as e:
+                st.error(f"No claims updated: {e}")
+
+    elif action == "Auto Allocate":
+        st.caption("Proposes one Pending claim per unclaimed listing expiring soon, largest quantity at "
+                   "risk of expiring first, preferring same-city receivers with a good completion record.")
+        col_days, col_cap, col_cross = st.columns(3)
+        horizon = col_days.number_input("Expiring within (days)", min_value=0, value=HORIZON_DAYS,
+                                        key="alloc_days")
+        capacity = col_cap.number_input("Max listings per receiver", min_value=1, value=MAX_PER_RECEIVER,
+                                        key="alloc_cap")
+        cross_city = col_cross.checkbox("Allow other cities", value=True, key="alloc_cross")
+
+        listings = run_query(pool, candidate_listings_sql, candidate_params(int(horizon)))
+        receivers = run_query(pool, candidate_receivers_sql)
+        proposals = allocate(listings, receivers, max_per_receiver=int(capacity), allow_cross_city=cross_city)
+        summary = allocation_summary(listings, proposals)
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Listings allocated", f"{summary['allocated']} / {summary['listings']}")
+        col2.metric("Same-city matches", summary["same_city"])
+        col3.metric("Unallocated quantity", summary["unallocated_quantity"])
+        st.dataframe(proposals.drop(columns="cost"), use_container_width=True)
+
+        if st.button(f"Create {len(proposals)} claims", key="alloc_go", disabled=proposals.empty):
+            try:
+                created = run_execute_many(pool, insert_claim_sql,
+                                           proposal_rows(proposals, datetime.now().strftime("%Y-%m-%d %H:%M")))
+                st.success(f"{created} Claims Added!")
+            except Exception as e:
+                st.error(f"No claims added: {e}")
+
+# ---------------- Performance (admin only) ----------------
+if is_admin:
+    st.subheader("⚙ Performance")
+    profiler = get_profiler()
+    perf = pd.DataFrame(profiler.summary())
+    if perf.empty:
+        st.info("No queries recorded yet.")
+    else:
+        st.dataframe(perf.drop(columns=["plan"]), use_container_width=True)
+        slow_statement = st.selectbox("Query plan for", perf["statement"].tolist())
+        st.code(perf.set_index("statement").loc[slow_statement, "plan"] or "(no plan)")
+    if profiler.trace_path:
+        st.caption(f"Tracing every call to {profiler.trace_path}")
+    if st.button("Reset statistics", key="reset_profiler"):
+        profiler.reset()
+
+    st.caption(f"Startup: database {bootstrap.action}, "
+               + ", ".join(f"{step} {seconds:.2f}s" for step, seconds in bootstrap.timings.items()))
+    col_pool, col_cache, col_snapshot, col_watch = st.columns(4)
+    with col_pool:
+        st.markdown("**Connection pool**")
+        st.json(pool.metrics())
+    with col_cache:
+        st.markdown("**Query cache**")
+        st.json(get_query_cache().stats())
+    with col_snapshot:
+        st.markdown("**Columnar snapshot**")
+        st.json(get_snapshot().stats())
+    with col_watch:
+        st.markdown("**Expiry watch**")
+        st.json(expiry_watch.stats())
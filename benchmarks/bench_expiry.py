@@ -0,0 +1,101 @@
+"""Benchmark the listings-grid expiry classification.
+
+Compares the original per-row implementation (Series.apply + two more
+apply passes + Styler.apply(axis=1)) against expiry.classify_expiry plus
+expiry.expiry_row_styles, which builds the styles from the Color column.
+
+Usage:
+    python benchmarks/bench_expiry.py
+    python benchmarks/bench_expiry.py --sizes 10000 100000 --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from expiry import classify_expiry, expiry_row_styles
+
+
+def make_listings(n_rows, today, seed=0):
+    """Synthetic Expiry_Date column spread over +/- 2 weeks around today"""
+    rng = np.random.default_rng(seed)
+    offsets = pd.to_timedelta(rng.integers(-14, 15, size=n_rows), unit="D")
+    expiry = (today + offsets).strftime("%Y-%m-%d")
+    return pd.DataFrame({
+        "Food_ID": np.arange(1, n_rows + 1),
+        "Quantity": rng.integers(1, 51, size=n_rows),
+        "Expiry_Date": expiry,
+    })
+
+
+# ---- Original implementation from app/streamlit_app.py, kept for comparison ----
+def legacy_classify(listings_df, today):
+    today = today.date()
+    soon_limit = today + timedelta(days=2)
+
+    def get_expiry_status(exp_date_str):
+        try:
+            exp_date = pd.to_datetime(exp_date_str).date()
+            if exp_date == today:
+                return ("⚠ Expiring Today", "#ff4d4d")
+            elif today < exp_date <= soon_limit:
+                return ("⚠ Expiring Soon", "#ffcccc")
+            else:
+                return ("", "")
+        except Exception:
+            return ("", "")
+
+    listings_df = listings_df.copy()
+    expiry_info = listings_df["Expiry_Date"].apply(get_expiry_status)
+    listings_df["Expiry Alert"] = expiry_info.apply(lambda x: x[0])
+    listings_df["Color"] = expiry_info.apply(lambda x: x[1])
+    return listings_df
+
+
+def legacy_styles(listings_df):
+    def highlight_row(row):
+        if row["Color"]:
+            return ["background-color: " + row["Color"]] * len(row)
+        return [""] * len(row)
+
+    return listings_df.apply(highlight_row, axis=1, result_type="expand")
+
+
+def time_call(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    today = pd.Timestamp.now().normalize()
+    print(f"{'rows':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for n_rows in args.sizes:
+        df = make_listings(n_rows, today)
+
+        # Sanity check: both implementations must agree before timing them
+        fast = classify_expiry(df, today=today)
+        slow = legacy_classify(df, today)
+        assert (fast["Expiry Alert"].to_numpy() == slow["Expiry Alert"].to_numpy()).all()
+
+        legacy = time_call(lambda: legacy_styles(legacy_classify(df, today)), args.repeat)
+        vectorized = time_call(lambda: expiry_row_styles(classify_expiry(df, today=today)), args.repeat)
+        print(f"{n_rows:>10} {legacy:>12.3f} {vectorized:>15.3f} {legacy / vectorized:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark dashboard cold start: time to first paint and to a full first run.
+
+Each run is a fresh Python process, like a new start.sh container, running
+app/streamlit_app.py once through Streamlit's AppTest harness on a scratch
+copy of the repo. First paint is the moment the script reaches st.title;
+the full run includes the DB bootstrap and every widget of the first page.
+
+Two scenarios are timed:
+    cold  -- no food_wastage.db yet, so the first run builds it
+    warm  -- the DB exists and is on the current SCHEMA_VERSION
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child process; prints one JSON line with its timings
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+marks = {}
+_title = st.title
+def title(*args, **kwargs):
+    marks.setdefault("first_paint_s", time.perf_counter() - start)
+    return _title(*args, **kwargs)
+st.title = title
+
+at = AppTest.from_file(sys.argv[1], default_timeout=600)
+at.run()
+marks["first_run_s"] = time.perf_counter() - start
+marks["errors"] = [str(e.value) for e in at.exception]
+print(json.dumps(marks))
+"""
+
+
+def copy_repo(work_dir):
+    dst = os.path.join(work_dir, "repo")
+    shutil.copytree(ROOT, dst, ignore=shutil.ignore_patterns(".git", "*.db", "*.db-*", "bench_results.json"))
+    return dst
+
+
+def run_once(repo):
+    out = subprocess.check_output([sys.executable, "-c", CHILD, os.path.join(repo, "app", "streamlit_app.py")],
+                                  cwd=repo, stderr=subprocess.DEVNULL, text=True)
+    marks = json.loads(out.strip().splitlines()[-1])
+    if marks["errors"]:
+        raise RuntimeError(f"app raised: {marks['errors']}")
+    return marks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="food_wastage_startup_")
+    try:
+        repo = copy_repo(work_dir)
+        db_path = os.path.join(repo, "food_wastage.db")
+        print(f"{'scenario':<8} {'first paint (s)':>16} {'first run (s)':>14}")
+        for scenario in ("cold", "warm"):
+            runs = []
+            for _ in range(args.repeat):
+                if scenario == "cold":
+                    for suffix in ("", "-wal", "-shm"):
+                        if os.path.exists(db_path + suffix):
+                            os.remove(db_path + suffix)
+                runs.append(run_once(repo))
+            paint = statistics.median(r["first_paint_s"] for r in runs)
+            full = statistics.median(r["first_run_s"] for r in runs)
+            print(f"{scenario:<8} {paint:>16.3f} {full:>14.3f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
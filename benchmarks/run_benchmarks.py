@@ -0,0 +1,227 @@
+"""Loader and query benchmarks over synthetic scaled datasets.
+
+For every scale this generates deterministic data (benchmarks/synth_data.py),
+builds the DB in a child process (wall time + peak RSS), times a no-op
+incremental load, and then times each Quick Analytics query, each query_map
+entry and the listings grid (count + page boundaries + first and last page)
+for every sidebar filter combination. The columnar snapshot (snapshot.py) is
+timed too: its load and memory footprint, then each analytics query it
+re-implements. Each query is timed `--repeat` times
+and then run once more under tracemalloc for its peak Python memory.
+
+Queries go straight to a read-only connection, bypassing the app's result
+cache, so the numbers reflect SQLite and pandas work only.
+
+Results are written as JSON; pass --compare with an earlier file to print
+per-item ratios, e.g. before/after an index, cache or loader change.
+
+Usage:
+    python benchmarks/run_benchmarks.py --scales 10 100 --out bench.json
+    python benchmarks/run_benchmarks.py --scales 10 --compare bench.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from db_pool import ConnectionPool
+from load_csv_to_sqlite import DEFAULT_CHUNK_SIZE
+from pagination import KeysetPager
+from queries import (query_map, QUICK_ANALYTICS, LISTING_COLUMNS, LISTING_SORT_KEYS,
+                     LISTING_FILTER_COLUMNS)
+from snapshot import ColumnarSnapshot, SNAPSHOT_COLUMNS, SNAPSHOT_QUICK_ANALYTICS, SNAPSHOT_QUERIES
+from synth_data import generate
+
+LOADER = os.path.join(ROOT, "load_csv_to_sqlite.py")
+GRID_PAGE_SIZE = 50
+
+
+def run_loader(db_path, data_dir, chunk_size, incremental=False):
+    """Run the loader CLI in a child process; returns (seconds, peak RSS in KB)"""
+    cmd = [sys.executable, LOADER, "--db", db_path, "--data-dir", data_dir, "--chunk-size", str(chunk_size)]
+    if incremental:
+        cmd.append("--incremental")
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode:
+        raise RuntimeError(f"loader failed with exit code {proc.returncode}")
+    # ru_maxrss is KB on Linux but bytes on macOS
+    peak_kb = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return elapsed, peak_kb
+
+
+def measure(fn, repeat):
+    """Time fn() repeat times, then once more under tracemalloc for peak memory"""
+    runs = []
+    rows = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = fn()
+        runs.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"median_s": statistics.median(runs), "min_s": min(runs), "runs_s": runs,
+            "peak_py_bytes": peak, "rows": rows}
+
+
+def read(con, sql, params=()):
+    return pd.read_sql_query(sql, con, params=list(params))
+
+
+def grid_fetch(con, pager):
+    """Everything the listings grid does: count, boundaries, first and last page"""
+    total = int(read(con, *pager.count_query())["total"][0])
+    boundaries = read(con, *pager.boundaries_query(GRID_PAGE_SIZE))
+    read(con, *pager.page_query(None, GRID_PAGE_SIZE))
+    if len(boundaries):
+        read(con, *pager.page_query(boundaries.iloc[-1].tolist(), GRID_PAGE_SIZE))
+    return total
+
+
+def load_snapshot(snap):
+    """Load every snapshot table from scratch; returns the total row count"""
+    snap.clear()
+    return sum(len(snap.table(table)) for table in SNAPSHOT_COLUMNS)
+
+
+def filter_combinations(con):
+    """All / most common value for each sidebar filter: 16 combinations"""
+    choices = []
+    for column in LISTING_FILTER_COLUMNS:
+        top = con.execute(f"SELECT {column} FROM food_listings GROUP BY {column} "
+                          f"ORDER BY COUNT(*) DESC LIMIT 1;").fetchone()
+        choices.append([None] + ([top[0]] if top else []))
+    for combo in itertools.product(*choices):
+        yield [(col, value) for col, value in zip(LISTING_FILTER_COLUMNS, combo) if value is not None]
+
+
+def bench_scale(scale, work_dir, repeat, chunk_size, seed):
+    results = []
+    data_dir = os.path.join(work_dir, f"scale_{scale}")
+    db_path = os.path.join(data_dir, "food_wastage.db")
+
+    start = time.perf_counter()
+    counts = generate(scale, data_dir, seed=seed, anchor=date.today())
+    results.append({"scale": scale, "kind": "generate", "name": "synth_data",
+                    "median_s": time.perf_counter() - start, "rows": counts})
+
+    for name, incremental in (("build_db", False), ("update_db (no changes)", True)):
+        elapsed, peak_kb = run_loader(db_path, data_dir, chunk_size, incremental=incremental)
+        results.append({"scale": scale, "kind": "loader", "name": name, "median_s": elapsed,
+                        "peak_rss_kb": peak_kb, "chunk_size": chunk_size})
+
+    uri = "file:" + db_path + "?mode=ro"
+    con = sqlite3.connect(uri, uri=True)
+    try:
+        for kind, queries in (("quick_analytics", QUICK_ANALYTICS), ("query_map", query_map)):
+            for name, sql in queries.items():
+                stats = measure(lambda: len(read(con, sql)), repeat)
+                results.append(dict(stats, scale=scale, kind=kind, name=name))
+
+        for filters in filter_combinations(con):
+            pager = KeysetPager("food_listings", LISTING_COLUMNS, LISTING_SORT_KEYS, filters)
+            name = ", ".join(f"{col}={value}" for col, value in filters) or "no filters"
+            stats = measure(lambda: grid_fetch(con, pager), repeat)
+            results.append(dict(stats, scale=scale, kind="listings_grid", name=name))
+    finally:
+        con.close()
+
+    pool = ConnectionPool(db_path)
+    try:
+        snap = ColumnarSnapshot(pool)
+        stats = measure(lambda: load_snapshot(snap), repeat)
+        memory = sum(t["memory_bytes"] for t in snap.stats()["tables"].values())
+        results.append(dict(stats, scale=scale, kind="snapshot", name="load", memory_bytes=memory))
+        for kind, queries in (("quick_analytics", SNAPSHOT_QUICK_ANALYTICS), ("query_map", SNAPSHOT_QUERIES)):
+            for name, fn in queries.items():
+                stats = measure(lambda: len(fn(snap)), repeat)
+                results.append(dict(stats, scale=scale, kind=f"snapshot_{kind}", name=name))
+    finally:
+        pool.close()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path, new_results):
+    with open(old_path) as fh:
+        old = {(r["scale"], r["kind"], r["name"]): r for r in json.load(fh)["results"]}
+    print(f"{'scale':>6} {'kind':<16} {'name':<45} {'old (s)':>9} {'new (s)':>9} {'ratio':>7}")
+    for r in new_results:
+        before = old.get((r["scale"], r["kind"], r["name"]))
+        if before and before["median_s"]:
+            ratio = r["median_s"] / before["median_s"]
+            print(f"{r['scale']:>6} {r['kind']:<16} {r['name'][:45]:<45} "
+                  f"{before['median_s']:>9.4f} {r['median_s']:>9.4f} {ratio:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the loader and dashboard queries")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--work-dir", help="where generated data/DBs go (default: a temp dir)")
+    parser.add_argument("--keep", action="store_true", help="keep the generated data afterwards")
+    parser.add_argument("--out", default="bench_results.json", help="JSON file to write")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="food_wastage_bench_")
+    results = []
+    try:
+        for scale in args.scales:
+            print(f"Benchmarking {scale}x ...", flush=True)
+            results.extend(bench_scale(scale, work_dir, args.repeat, args.chunk_size, args.seed))
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "pandas": pd.__version__,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as fh:
+        json.dump(report, fh, indent=2, default=str)
+    print(f"Wrote {len(results)} results to {args.out}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Deterministic synthetic CSV exports for benchmarking.
+
+Scales the sample files in data/ by an integer factor (10x-1000x) while
+keeping their schema and value distributions: every generated row resamples
+the columns of a sample row, IDs are renumbered, foreign keys point at
+uniformly chosen parents, and listings inherit Provider_Type / Location from
+their provider exactly like the real exports. The city pool grows with the
+scale (a "City" becomes "City", "City 1", "City 2", ...) so per-city row
+counts stay close to the sample's.
+
+Files are written in chunks, so generating 1000x data does not need the
+whole output in memory. The same (scale, seed, anchor) always produces
+byte-identical files.
+
+A city_coordinates.csv gazetteer is written alongside. The sample city
+names are made up, so each base city gets a fixed pseudo-random position
+(hashed from its name) inside GAZETTEER_BOX and every "City <n>" variant
+sits within VARIANT_SPREAD_KM of it. The bundled data/city_coordinates.csv
+is this gazetteer for the sample files (--gazetteer-only --out data).
+
+Usage:
+    python benchmarks/synth_data.py --scale 100 --out /tmp/fw_100x
+    python benchmarks/synth_data.py --gazetteer-only --out data
+"""
+import argparse
+import hashlib
+import math
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load_csv_to_sqlite import (DATA_DIR, LOAD_ORDER, TABLE_COLUMNS,
+                                CSV_DATE_FORMAT, CSV_TIMESTAMP_FORMAT)
+from geo import GAZETTEER_FILE, KM_PER_DEGREE_LAT
+
+CHUNK_ROWS = 100_000
+
+# Synthetic gazetteer: (min_lat, max_lat, min_lon, max_lon) base cities are spread over
+GAZETTEER_BOX = (18.0, 22.0, 73.0, 78.0)
+VARIANT_SPREAD_KM = 15
+
+
+def _labels(values, variants):
+    """'City' for variant 0, 'City <n>' otherwise"""
+    values = pd.Series(values, dtype=object)
+    suffix = pd.Series(variants).astype(str)
+    return values.where(variants == 0, values + " " + suffix).to_numpy()
+
+
+def _sample_files(data_dir):
+    return {table: pd.read_csv(os.path.join(data_dir, filename)) for table, filename in LOAD_ORDER}
+
+
+def _write_chunks(path, table, n_rows, make_chunk):
+    """Call make_chunk(start_id, size) for consecutive ID ranges and append to path"""
+    with open(path, "w", newline="") as fh:
+        for start in range(0, n_rows, CHUNK_ROWS):
+            size = min(CHUNK_ROWS, n_rows - start)
+            chunk = make_chunk(start + 1, size)
+            chunk[TABLE_COLUMNS[table]].to_csv(fh, index=False, header=start == 0)
+
+
+def _unit_pair(name):
+    """Two stable pseudo-random numbers in [0, 1) derived from name"""
+    digest = hashlib.sha256(name.encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64, int.from_bytes(digest[8:16], "big") / 2 ** 64
+
+
+def city_coordinates(cities):
+    """Synthetic City, Latitude, Longitude rows for the given city names"""
+    min_lat, max_lat, min_lon, max_lon = GAZETTEER_BOX
+    rows = []
+    for city in cities:
+        variant = re.fullmatch(r"(.+) (\d+)", city)
+        u, v = _unit_pair(variant.group(1) if variant else city)
+        lat, lon = min_lat + u * (max_lat - min_lat), min_lon + v * (max_lon - min_lon)
+        if variant:
+            du, dv = _unit_pair(city)
+            lat += (2 * du - 1) * VARIANT_SPREAD_KM / KM_PER_DEGREE_LAT
+            lon += (2 * dv - 1) * VARIANT_SPREAD_KM / (KM_PER_DEGREE_LAT * math.cos(math.radians(lat)))
+        rows.append((city, round(lat, 5), round(lon, 5)))
+    return pd.DataFrame(rows, columns=["City", "Latitude", "Longitude"])
+
+
+def write_gazetteer(out_dir, scale=1, data_dir=DATA_DIR):
+    """Write city_coordinates.csv covering every city generate() can emit at this scale"""
+    os.makedirs(out_dir, exist_ok=True)
+    sample = _sample_files(data_dir)
+    base = sorted(set(sample["providers"]["City"]) | set(sample["receivers"]["City"]))
+    cities = [city if n == 0 else f"{city} {n}" for city in base for n in range(scale)]
+    gazetteer = city_coordinates(cities)
+    gazetteer.to_csv(os.path.join(out_dir, GAZETTEER_FILE), index=False)
+    return len(gazetteer)
+
+
+def generate(scale, out_dir, seed=0, anchor=None, data_dir=DATA_DIR):
+    """Write scaled *_data.csv files to out_dir and return their row counts.
+
+    anchor (a date) shifts every expiry date and claim timestamp so the
+    sample's median expiry lands on it; by default dates are kept as-is.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    sample = _sample_files(data_dir)
+    n_rows = {table: len(df) * scale for table, df in sample.items()}
+    rngs = {table: np.random.default_rng([seed, i]) for i, (table, _) in enumerate(LOAD_ORDER)}
+
+    expiry = pd.to_datetime(sample["food_listings"]["Expiry_Date"], format=CSV_DATE_FORMAT)
+    stamps = pd.to_datetime(sample["claims"]["Timestamp"], format=CSV_TIMESTAMP_FORMAT)
+    shift = pd.Timedelta(0)
+    if anchor is not None:
+        shift = pd.Timestamp(anchor).normalize() - expiry.sort_values().iloc[len(expiry) // 2]
+    expiry = (expiry + shift).dt.strftime(CSV_DATE_FORMAT).to_numpy()
+    stamps = (stamps + shift).dt.strftime(CSV_TIMESTAMP_FORMAT).to_numpy()
+
+    # Providers are kept as (sample row, city variant) so listings can inherit
+    # their Type and City without holding the provider table in memory.
+    prov = sample["providers"]
+    prov_rng = rngs["providers"]
+    prov_src = prov_rng.integers(0, len(prov), n_rows["providers"])
+    prov_variant = prov_rng.integers(0, scale, n_rows["providers"])
+    prov_city = _labels(prov["City"].to_numpy()[prov_src], prov_variant)
+
+    def providers_chunk(start, size):
+        idx = slice(start - 1, start - 1 + size)
+        src, variant = prov_src[idx], prov_variant[idx]
+        return pd.DataFrame({
+            "Provider_ID": np.arange(start, start + size),
+            "Name": _labels(prov["Name"].to_numpy()[src], variant),
+            "Type": prov["Type"].to_numpy()[src],
+            "Address": prov["Address"].to_numpy()[src],
+            "City": prov_city[idx],
+            "Contact": prov["Contact"].to_numpy()[src],
+        })
+
+    recv = sample["receivers"]
+
+    def receivers_chunk(start, size):
+        rng = rngs["receivers"]
+        src = rng.integers(0, len(recv), size)
+        variant = rng.integers(0, scale, size)
+        return pd.DataFrame({
+            "Receiver_ID": np.arange(start, start + size),
+            "Name": _labels(recv["Name"].to_numpy()[src], variant),
+            "Type": recv["Type"].to_numpy()[src],
+            "City": _labels(recv["City"].to_numpy()[src], variant),
+            "Contact": recv["Contact"].to_numpy()[src],
+        })
+
+    food = sample["food_listings"]
+
+    def food_chunk(start, size):
+        rng = rngs["food_listings"]
+        pick = lambda: rng.integers(0, len(food), size)
+        provider = rng.integers(0, n_rows["providers"], size)
+        return pd.DataFrame({
+            "Food_ID": np.arange(start, start + size),
+            "Food_Name": food["Food_Name"].to_numpy()[pick()],
+            "Quantity": food["Quantity"].to_numpy()[pick()],
+            "Expiry_Date": expiry[pick()],
+            "Provider_ID": provider + 1,
+            "Provider_Type": prov["Type"].to_numpy()[prov_src[provider]],
+            "Location": prov_city[provider],
+            "Food_Type": food["Food_Type"].to_numpy()[pick()],
+            "Meal_Type": food["Meal_Type"].to_numpy()[pick()],
+        })
+
+    claims = sample["claims"]
+
+    def claims_chunk(start, size):
+        rng = rngs["claims"]
+        return pd.DataFrame({
+            "Claim_ID": np.arange(start, start + size),
+            "Food_ID": rng.integers(1, n_rows["food_listings"] + 1, size),
+            "Receiver_ID": rng.integers(1, n_rows["receivers"] + 1, size),
+            "Status": claims["Status"].to_numpy()[rng.integers(0, len(claims), size)],
+            "Timestamp": stamps[rng.integers(0, len(claims), size)],
+        })
+
+    makers = {"providers": providers_chunk, "receivers": receivers_chunk,
+              "food_listings": food_chunk, "claims": claims_chunk}
+    for table, filename in LOAD_ORDER:
+        _write_chunks(os.path.join(out_dir, filename), table, n_rows[table], makers[table])
+    write_gazetteer(out_dir, scale, data_dir)
+    return n_rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate scaled synthetic CSV exports")
+    parser.add_argument("--scale", type=int, default=1, help="multiple of the sample row counts")
+    parser.add_argument("--out", required=True, help="output directory for the *_data.csv files")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--anchor", help="shift dates so the median expiry falls on this date (YYYY-MM-DD)")
+    parser.add_argument("--gazetteer-only", action="store_true",
+                        help="only write city_coordinates.csv (e.g. --out data for the bundled one)")
+    args = parser.parse_args()
+
+    if args.gazetteer_only:
+        print(f"{GAZETTEER_FILE}: {write_gazetteer(args.out, args.scale)} cities")
+        sys.exit()
+
+    counts = generate(args.scale, args.out, seed=args.seed, anchor=args.anchor)
+    for table, n in counts.items():
+        print(f"{table}: {n} rows")
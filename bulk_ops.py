@@ -0,0 +1,67 @@
+"""Validation and SQL for the bulk CRUD modes.
+
+The app runs these statements with run_execute_many / run_execute, which
+wrap them in a single transaction: either every row is applied or none is.
+"""
+import pandas as pd
+
+from load_csv_to_sqlite import CSV_DATE_FORMAT, ISO_DATE_FORMAT
+
+# Columns a bulk listing upload must provide (Food_ID is assigned by SQLite)
+LISTING_INPUT_COLUMNS = ["Food_Name", "Quantity", "Expiry_Date", "Provider_ID",
+                         "Provider_Type", "Location", "Food_Type", "Meal_Type"]
+
+insert_listing_sql = (
+    "INSERT INTO food_listings (Food_Name, Quantity, Expiry_Date, Provider_ID, Provider_Type, "
+    "Location, Food_Type, Meal_Type) VALUES (?,?,?,?,?,?,?,?)"
+)
+
+update_claim_status_sql = "UPDATE claims SET Status=? WHERE Claim_ID=?"
+
+
+def listing_rows(df):
+    """Validate an uploaded/edited listings frame and return insert parameter rows.
+
+    Expiry_Date may be ISO (YYYY-MM-DD) or the export's M/D/YYYY. Raises
+    ValueError describing the first problem found.
+    """
+    missing = [c for c in LISTING_INPUT_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    df = df[LISTING_INPUT_COLUMNS].dropna(how="all")
+    if df.empty:
+        raise ValueError("No rows to insert")
+    incomplete = df[df.isna().any(axis=1)]
+    if not incomplete.empty:
+        raise ValueError(f"Rows with empty fields: {', '.join(str(i + 1) for i in incomplete.index[:10])}")
+
+    dates = df["Expiry_Date"].astype(str).str.strip()
+    parsed = pd.to_datetime(dates, format=ISO_DATE_FORMAT, errors="coerce")
+    parsed = parsed.fillna(pd.to_datetime(dates, format=CSV_DATE_FORMAT, errors="coerce"))
+    if parsed.isna().any():
+        raise ValueError(f"Unreadable Expiry_Date: {dates[parsed.isna()].iloc[0]!r}")
+
+    quantity = pd.to_numeric(df["Quantity"], errors="coerce")
+    provider = pd.to_numeric(df["Provider_ID"], errors="coerce")
+    if quantity.isna().any() or (quantity < 1).any():
+        raise ValueError("Quantity must be a positive number")
+    if provider.isna().any():
+        raise ValueError("Provider_ID must be numeric")
+
+    df = df.assign(Quantity=quantity.astype(int), Provider_ID=provider.astype(int),
+                   Expiry_Date=parsed.dt.strftime(ISO_DATE_FORMAT))
+    return list(df.astype(object).itertuples(index=False, name=None))
+
+
+def listing_filter_clause(location=None, food_type=None, meal_type=None, expires_before=None):
+    """WHERE clause + params for a bulk delete; None means "any"."""
+    clauses, params = [], []
+    for column, value in (("Location", location), ("Food_Type", food_type), ("Meal_Type", meal_type)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if expires_before is not None:
+        clauses.append("Expiry_Date < ?")
+        params.append(expires_before.isoformat())
+    return " AND ".join(clauses), params
@@ -0,0 +1,140 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# ====== Pool settings ======
+MAX_READERS = 8
+BUSY_TIMEOUT_MS = 5000
+
+
+class ConnectionPool:
+    """Read-only SQLite connections for queries plus one serialized writer.
+
+    The database is switched to WAL so readers never block behind the writer
+    (and vice versa). Each script run checks a reader out of a bounded pool
+    for the duration of a query; all writes go through a single connection
+    guarded by a lock, with a busy timeout for writers in other processes
+    such as the CSV loader.
+    """
+
+    def __init__(self, db_file, max_readers=MAX_READERS, busy_timeout_ms=BUSY_TIMEOUT_MS):
+        self.db_file = os.path.abspath(db_file)
+        self.max_readers = max_readers
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._create_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = None
+
+        self._metrics_lock = threading.Lock()
+        self._readers_in_use = 0
+        self._writer_in_use = 0
+        self._stats = {
+            "read_acquires": 0, "read_wait_total_s": 0.0, "read_wait_max_s": 0.0,
+            "write_acquires": 0, "write_wait_total_s": 0.0, "write_wait_max_s": 0.0,
+        }
+
+        con = sqlite3.connect(self.db_file, timeout=busy_timeout_ms / 1000)
+        con.execute("PRAGMA journal_mode = WAL;")
+        con.close()
+
+    # ---- Connections ----
+    def _connect_reader(self):
+        uri = Path(self.db_file).as_uri() + "?mode=ro"
+        con = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                              timeout=self.busy_timeout_ms / 1000)
+        con.execute("PRAGMA query_only = ON;")
+        return con
+
+    def _connect_writer(self):
+        con = sqlite3.connect(self.db_file, check_same_thread=False,
+                              timeout=self.busy_timeout_ms / 1000)
+        con.execute("PRAGMA foreign_keys = ON;")
+        con.execute("PRAGMA synchronous = NORMAL;")
+        return con
+
+    def _record_wait(self, kind, waited):
+        with self._metrics_lock:
+            self._stats[f"{kind}_acquires"] += 1
+            self._stats[f"{kind}_wait_total_s"] += waited
+            self._stats[f"{kind}_wait_max_s"] = max(self._stats[f"{kind}_wait_max_s"], waited)
+
+    def _checkout_reader(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._create_lock:
+            if self._created < self.max_readers:
+                self._created += 1
+                return self._connect_reader()
+        return self._idle.get()  # pool exhausted: wait for a reader to come back
+
+    @contextmanager
+    def reader(self):
+        """Check out a read-only connection for the duration of the block"""
+        start = time.perf_counter()
+        con = self._checkout_reader()
+        self._record_wait("read", time.perf_counter() - start)
+        with self._metrics_lock:
+            self._readers_in_use += 1
+        try:
+            yield con
+        finally:
+            with self._metrics_lock:
+                self._readers_in_use -= 1
+            self._idle.put(con)
+
+    @contextmanager
+    def writer(self):
+        """Hold the single writer connection; commits on success, rolls back on error"""
+        start = time.perf_counter()
+        with self._write_lock:
+            self._record_wait("write", time.perf_counter() - start)
+            if self._writer is None:
+                self._writer = self._connect_writer()
+            with self._metrics_lock:
+                self._writer_in_use = 1
+            try:
+                yield self._writer
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+            finally:
+                with self._metrics_lock:
+                    self._writer_in_use = 0
+
+    # ---- Metrics ----
+    def metrics(self):
+        with self._metrics_lock:
+            stats = dict(self._stats)
+            stats.update(
+                readers_open=self._created,
+                readers_in_use=self._readers_in_use,
+                writer_in_use=self._writer_in_use,
+                max_readers=self.max_readers,
+            )
+        for kind in ("read", "write"):
+            acquires = stats[f"{kind}_acquires"]
+            stats[f"{kind}_wait_avg_s"] = stats[f"{kind}_wait_total_s"] / acquires if acquires else 0.0
+        return stats
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._create_lock:
+            self._created = 0
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
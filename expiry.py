@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+# ====== Expiry alert settings ======
+SOON_DAYS = 2
+EXPIRING_TODAY = ("⚠ Expiring Today", "#ff4d4d")
+EXPIRING_SOON = ("⚠ Expiring Soon", "#ffcccc")
+
+
+def classify_expiry(listings_df, today=None, soon_days=SOON_DAYS):
+    """Return a copy of listings_df with "Expiry Alert" and "Color" columns.
+
+    Expiry_Date is parsed once for the whole column and the labels are picked
+    with boolean masks, so the cost is a handful of vectorized passes no
+    matter how many rows the grid holds. Unparseable dates get no alert.
+    """
+    if today is None:
+        today = pd.Timestamp.now().normalize()
+    today = pd.Timestamp(today).normalize()
+
+    expiry = pd.to_datetime(listings_df["Expiry_Date"], format="%Y-%m-%d", errors="coerce")
+    days_left = (expiry - today).dt.days.to_numpy(dtype="float64", na_value=np.nan)
+
+    conditions = [days_left == 0, (days_left > 0) & (days_left <= soon_days)]
+    labels = np.select(conditions, [EXPIRING_TODAY[0], EXPIRING_SOON[0]], default="")
+    colors = np.select(conditions, [EXPIRING_TODAY[1], EXPIRING_SOON[1]], default="")
+
+    return listings_df.assign(**{"Expiry Alert": labels, "Color": colors})
+
+
+def expiry_row_styles(df):
+    """Styler.apply(..., axis=None) callback that colors rows from the Color column"""
+    colors = df["Color"].to_numpy(dtype=object)
+    css = np.where(colors != "", "background-color: " + colors.astype(str), "")
+    return pd.DataFrame(
+        np.repeat(css[:, None], df.shape[1], axis=1),
+        index=df.index,
+        columns=df.columns,
+    )
@@ -0,0 +1,348 @@
+"""Background expiry watch: alerts for unclaimed listings nearing expiry.
+
+A daemon thread keeps every open listing (not expired, no Pending /
+Completed claim) in a min-heap keyed by the date of its next alert, i.e.
+Expiry_Date minus the next threshold in ALERT_THRESHOLDS_DAYS. When that
+date arrives it writes one expiry_alerts row per receiver in the listing's
+city, an outbox for whatever delivers the notifications (Sent_At is left
+for it to fill in).
+
+The heap is loaded with one scan at start. After that, triggers on
+food_listings and claims queue the Food_ID of every change in
+expiry_watch_changes. The watcher re-reads just those listings by primary
+key and pushes a fresh heap entry, so a change costs O(log n) whichever
+path made it (dashboard CRUD, bulk operations, cascades, the incremental
+loader). Superseded entries are not removed from the heap. A per-listing
+token marks the live one and stale entries are skipped when they surface.
+A full rebuild by the loader queues a NULL Food_ID, which makes the
+watcher reload.
+
+Usage (without the dashboard, e.g. from cron):
+    python expiry_watch.py --once
+"""
+import argparse
+import heapq
+import itertools
+import threading
+import time
+from datetime import date, datetime
+
+from expiry import SOON_DAYS
+
+# ====== Watch settings ======
+# Alert when this many days are left until Expiry_Date, largest first
+ALERT_THRESHOLDS_DAYS = (SOON_DAYS, 0)
+# Longest sleep between checks; bounds how late writes from other processes
+# and the daily rollover are noticed
+POLL_INTERVAL_S = 60
+CHANGE_BATCH = 1000
+
+expiry_watch_schema_sql = """
+CREATE TABLE IF NOT EXISTS expiry_alerts (
+    Alert_ID INTEGER PRIMARY KEY,
+    Food_ID INTEGER NOT NULL,
+    Receiver_ID INTEGER NOT NULL,
+    City TEXT NOT NULL,
+    Expiry_Date TEXT NOT NULL,
+    Threshold_Days INTEGER NOT NULL,
+    Created_At TEXT NOT NULL,
+    Sent_At TEXT,
+    UNIQUE (Food_ID, Receiver_ID, Expiry_Date, Threshold_Days)
+);
+
+-- AUTOINCREMENT: the watcher reads Change_ID > last seen, so IDs must not
+-- be reused once it has emptied the queue
+CREATE TABLE IF NOT EXISTS expiry_watch_changes (
+    Change_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Food_ID INTEGER
+);
+"""
+
+
+def _queue_sql(*refs):
+    return ("INSERT INTO expiry_watch_changes (Food_ID) "
+            + " UNION ".join(f"SELECT {ref}.Food_ID" for ref in refs) + ";")
+
+
+EXPIRY_WATCH_TRIGGERS = {
+    "trg_expiry_watch_food_insert": f"AFTER INSERT ON food_listings BEGIN {_queue_sql('NEW')} END",
+    "trg_expiry_watch_food_delete": f"AFTER DELETE ON food_listings BEGIN {_queue_sql('OLD')} END",
+    "trg_expiry_watch_food_update":
+        f"AFTER UPDATE OF Food_ID, Expiry_Date ON food_listings BEGIN {_queue_sql('OLD', 'NEW')} END",
+    "trg_expiry_watch_claims_insert": f"AFTER INSERT ON claims BEGIN {_queue_sql('NEW')} END",
+    "trg_expiry_watch_claims_delete": f"AFTER DELETE ON claims BEGIN {_queue_sql('OLD')} END",
+    "trg_expiry_watch_claims_update":
+        f"AFTER UPDATE OF Food_ID, Status ON claims BEGIN {_queue_sql('OLD', 'NEW')} END",
+}
+
+_OPEN_LISTINGS = """
+SELECT f.Food_ID, f.Expiry_Date
+FROM food_listings f
+WHERE {where} AND f.Expiry_Date >= ?
+  AND NOT EXISTS (SELECT 1 FROM claims c
+                  WHERE c.Food_ID = f.Food_ID AND c.Status IN ('Pending', 'Completed'));
+"""
+open_listings_sql = _OPEN_LISTINGS.format(where="1=1")
+listing_state_sql = _OPEN_LISTINGS.format(where="f.Food_ID = ?")
+
+pending_changes_sql = """
+SELECT Change_ID, Food_ID FROM expiry_watch_changes WHERE Change_ID > ? ORDER BY Change_ID LIMIT ?;
+"""
+
+# One outbox row per receiver in the listing's city
+insert_alerts_sql = """
+INSERT OR IGNORE INTO expiry_alerts (Food_ID, Receiver_ID, City, Expiry_Date, Threshold_Days, Created_At)
+SELECT f.Food_ID, r.Receiver_ID, r.City, f.Expiry_Date, ?, ?
+FROM food_listings f JOIN receivers r ON r.City = f.Location
+WHERE f.Food_ID = ?;
+"""
+
+recent_alerts_sql = """
+SELECT a.Alert_ID, a.Created_At, a.Threshold_Days, a.Expiry_Date, a.Food_ID, f.Food_Name, a.City,
+       a.Receiver_ID, r.Name AS Receiver, r.Contact, a.Sent_At
+FROM expiry_alerts a
+LEFT JOIN food_listings f ON f.Food_ID = a.Food_ID
+LEFT JOIN receivers r ON r.Receiver_ID = a.Receiver_ID
+ORDER BY a.Alert_ID DESC
+LIMIT ?;
+"""
+
+
+def create_expiry_watch_tables(cur):
+    row = cur.execute("SELECT sql FROM sqlite_master WHERE name = 'expiry_watch_changes';").fetchone()
+    if row and "AUTOINCREMENT" not in row[0]:
+        cur.execute("DROP TABLE expiry_watch_changes;")  # older queue that reused Change_IDs
+    cur.executescript(expiry_watch_schema_sql)
+
+
+def create_expiry_watch_triggers(cur):
+    for name, body in EXPIRY_WATCH_TRIGGERS.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body};")
+
+
+def drop_expiry_watch_triggers(cur):
+    for name in EXPIRY_WATCH_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {name};")
+
+
+def reset_expiry_watch(cur):
+    """Empty the change queue and ask running watchers to reload (after bulk loads)"""
+    cur.executescript("BEGIN; DELETE FROM expiry_watch_changes; "
+                      "INSERT INTO expiry_watch_changes (Food_ID) VALUES (NULL); COMMIT;")
+
+
+class ExpiryWatch:
+    """Min-heap of open listings by next alert date, maintained by a daemon thread.
+
+    Heap entries are (alert day ordinal, token, Food_ID, expiry ordinal,
+    threshold index); an entry is live while its token is the one in
+    self._live for that Food_ID. invalidate, if given, is called with
+    ("expiry_alerts",) after alerts are written, e.g. QueryCache.bump.
+    clock returns today's date.
+    """
+
+    def __init__(self, pool, thresholds_days=ALERT_THRESHOLDS_DAYS, poll_interval_s=POLL_INTERVAL_S,
+                 invalidate=None, clock=date.today):
+        self.pool = pool
+        self.thresholds = sorted(thresholds_days, reverse=True)
+        self.poll_interval_s = poll_interval_s
+        self.invalidate = invalidate
+        self.clock = clock
+
+        self._heap = []
+        self._live = {}
+        self._tokens = itertools.count()
+        self._last_change = None  # None = not loaded yet
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._stats_lock = threading.Lock()
+        self._stats = {"reloads": 0, "changes_applied": 0, "stale_skipped": 0, "alert_events": 0,
+                       "alerts_written": 0, "last_check_s": 0.0, "last_error": None}
+
+    # ---- Thread ----
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="expiry-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def notify(self):
+        """Wake the watcher now instead of at the next poll, e.g. right after a write"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()  # before checking, so a write during the check wakes the next one
+            try:
+                self.check()
+            except Exception as e:  # keep watching; surfaced through stats()
+                self._set(last_error=repr(e))
+            self._wake.wait(self.poll_interval_s)
+
+    # ---- Heap maintenance ----
+    def _add(self, **counts):
+        with self._stats_lock:
+            for key, value in counts.items():
+                self._stats[key] += value
+
+    def _set(self, **values):
+        with self._stats_lock:
+            self._stats.update(values)
+
+    def _discard_changes(self):
+        with self.pool.writer() as con:
+            con.execute("DELETE FROM expiry_watch_changes WHERE Change_ID <= ?;", [self._last_change])
+
+    def _track(self, food_id, expiry_date):
+        """(Re)schedule a listing from its current state; expiry_date None = no longer open"""
+        if expiry_date is None:
+            self._live.pop(food_id, None)
+            return
+        expiry = date.fromisoformat(expiry_date).toordinal()
+        token = next(self._tokens)
+        self._live[food_id] = token
+        heapq.heappush(self._heap, (expiry - self.thresholds[0], token, food_id, expiry, 0))
+
+    def reload(self):
+        """Rebuild the heap from one scan of the open listings"""
+        today = self.clock().isoformat()
+        with self.pool.reader() as con:
+            # Changes up to here are reflected in the scan that follows
+            last_change = con.execute("SELECT COALESCE(MAX(Change_ID), 0) FROM expiry_watch_changes;").fetchone()[0]
+            rows = con.execute(open_listings_sql, [today]).fetchall()
+        self._live = {}
+        self._heap = []
+        for food_id, expiry_date in rows:
+            token = next(self._tokens)
+            self._live[food_id] = token
+            expiry = date.fromisoformat(expiry_date).toordinal()
+            self._heap.append((expiry - self.thresholds[0], token, food_id, expiry, 0))
+        heapq.heapify(self._heap)
+        self._last_change = last_change
+        self._discard_changes()
+        self._add(reloads=1)
+
+    def apply_changes(self):
+        """Re-read the listings queued by the triggers; returns how many were applied"""
+        applied = 0
+        while True:
+            today = self.clock().isoformat()
+            with self.pool.reader() as con:
+                rows = con.execute(pending_changes_sql, [self._last_change, CHANGE_BATCH]).fetchall()
+                food_ids = {food_id for _, food_id in rows}
+                if None not in food_ids:
+                    for food_id in food_ids:
+                        state = con.execute(listing_state_sql, [food_id, today]).fetchone()
+                        self._track(food_id, state[1] if state else None)
+            if not rows:
+                break
+            if None in food_ids:  # the loader rebuilt the tables
+                self.reload()
+                continue
+            self._last_change = rows[-1][0]
+            self._discard_changes()
+            applied += len(food_ids)
+        if len(self._heap) > 2 * len(self._live) + CHANGE_BATCH:
+            self._compact()
+        self._add(changes_applied=applied)
+        return applied
+
+    def _compact(self):
+        """Drop superseded entries once they outnumber the live ones (amortized O(1) per change)"""
+        self._heap = [entry for entry in self._heap if self._live.get(entry[2]) == entry[1]]
+        heapq.heapify(self._heap)
+
+    def due_alerts(self):
+        """Pop every entry due today; returns [(Food_ID, threshold days)] and reschedules the rest.
+
+        A listing whose alert date passed while nothing was watching gets only
+        the tightest threshold it has reached, not every one it skipped.
+        """
+        today = self.clock().toordinal()
+        alerts, stale = [], 0
+        while self._heap and self._heap[0][0] <= today:
+            _, token, food_id, expiry, level = heapq.heappop(self._heap)
+            if self._live.get(food_id) != token:
+                stale += 1
+                continue
+            days_left = expiry - today
+            if days_left < 0:
+                del self._live[food_id]
+                continue
+            while level + 1 < len(self.thresholds) and self.thresholds[level + 1] >= days_left:
+                level += 1
+            alerts.append((food_id, self.thresholds[level]))
+            if level + 1 < len(self.thresholds):
+                heapq.heappush(self._heap, (expiry - self.thresholds[level + 1], token, food_id, expiry, level + 1))
+            else:
+                del self._live[food_id]
+        self._add(stale_skipped=stale)
+        return alerts
+
+    def write_alerts(self, alerts):
+        """Outbox rows for same-city receivers; returns the number of new rows"""
+        if not alerts:
+            return 0
+        created_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+        with self.pool.writer() as con:
+            before = con.total_changes
+            con.executemany(insert_alerts_sql, [(threshold, created_at, food_id) for food_id, threshold in alerts])
+            written = con.total_changes - before
+        if self.invalidate is not None:
+            self.invalidate(("expiry_alerts",))
+        self._add(alert_events=len(alerts), alerts_written=written)
+        return written
+
+    def check(self):
+        """One pass: load if needed, apply queued changes, write the alerts now due"""
+        start = time.perf_counter()
+        if self._last_change is None:
+            self.reload()
+        self.apply_changes()
+        written = self.write_alerts(self.due_alerts())
+        self._set(last_check_s=time.perf_counter() - start)
+        return written
+
+    # ---- Metrics ----
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        heap = self._heap
+        head = heap[:1]  # the watcher thread may be popping meanwhile
+        next_alert = head[0][0] if head else None
+        stats.update(
+            running=bool(self._thread and self._thread.is_alive()),
+            tracked_listings=len(self._live),
+            heap_entries=len(heap),
+            next_alert=date.fromordinal(next_alert).isoformat() if next_alert else None,
+            thresholds_days=list(self.thresholds),
+        )
+        return stats
+
+
+if __name__ == "__main__":
+    from db_pool import ConnectionPool
+    from load_csv_to_sqlite import db_file
+
+    parser = argparse.ArgumentParser(description="Watch open listings and write expiry alerts")
+    parser.add_argument("--db", default=db_file, help="SQLite file to watch")
+    parser.add_argument("--once", action="store_true", help="check once and exit instead of watching")
+    parser.add_argument("--poll", type=float, default=POLL_INTERVAL_S,
+                        help="seconds between checks (default: %(default)s)")
+    args = parser.parse_args()
+
+    watch = ExpiryWatch(ConnectionPool(args.db), poll_interval_s=args.poll)
+    if args.once:
+        print(f"{watch.check()} alerts written; {watch.stats()['tracked_listings']} listings watched")
+    else:
+        watch.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            watch.stop()
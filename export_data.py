@@ -0,0 +1,245 @@
+"""Stream a query's result out of SQLite as CSV, Parquet or Arrow.
+
+Rows are pulled from the cursor with fetchmany and written batch by batch,
+so an export holds one batch in memory however large the result is. Parquet
+and Arrow need each column's type before the first batch is written, so they
+spool the rows to a temporary file first and take the types from the whole
+result. No DataFrame is built. CSV only needs the standard library. Parquet and Arrow
+(the IPC file format, readable by pyarrow, pandas and polars) need the
+optional pyarrow package.
+
+Usage:
+    python export_data.py claims claims.csv
+    python export_data.py food_listings listings.parquet
+    python export_data.py "Provider Contacts by City" contacts.csv
+    python export_data.py --sql "SELECT * FROM claims WHERE Status = 'Completed'" completed.arrow
+"""
+import argparse
+import csv
+import importlib.util
+import io
+import marshal
+import os
+import re
+import sqlite3
+import tempfile
+import time
+
+from safe_sql import connect_readonly, QueryTimeout, PROGRESS_STEPS
+from queries import query_map
+
+# ====== Export settings ======
+DEFAULT_BATCH_SIZE = 20_000
+EXPORT_TABLES = ["providers", "receivers", "food_listings", "claims"]
+
+# format -> (file extension, MIME type, needs pyarrow)
+EXPORT_FORMATS = {
+    "csv": (".csv", "text/csv", False),
+    "parquet": (".parquet", "application/vnd.apache.parquet", True),
+    "arrow": (".arrow", "application/vnd.apache.arrow.file", True),
+}
+
+
+def available_formats():
+    """Formats usable in this environment (Parquet / Arrow only with pyarrow installed)"""
+    has_pyarrow = importlib.util.find_spec("pyarrow") is not None
+    return [fmt for fmt, (_, _, needs_pyarrow) in EXPORT_FORMATS.items() if has_pyarrow or not needs_pyarrow]
+
+
+def format_for_path(path):
+    """Export format implied by a file extension"""
+    ext = os.path.splitext(path)[1].lower()
+    for fmt, (fmt_ext, _, _) in EXPORT_FORMATS.items():
+        if ext == fmt_ext:
+            return fmt
+    raise ValueError(f"Unknown export extension {ext!r}; use one of "
+                     f"{', '.join(e for e, _, _ in EXPORT_FORMATS.values())}")
+
+
+def file_stem(name):
+    """File-name-safe version of a report or table name, e.g. "Claims per Food Item" -> claims_per_food_item"""
+    return re.sub(r"\W+", "_", name.lower()).strip("_")
+
+
+def source_sql(source):
+    """SQL for a table name or a query_map report name"""
+    if source in EXPORT_TABLES:
+        return f"SELECT * FROM {source};"
+    if source in query_map:
+        return query_map[source]
+    raise ValueError(f"Unknown export source {source!r}: expected a table ({', '.join(EXPORT_TABLES)}) "
+                     f"or a predefined query name")
+
+
+def iter_batches(cur, batch_size=DEFAULT_BATCH_SIZE):
+    """Lists of up to batch_size row tuples until the cursor is exhausted"""
+    while True:
+        batch = cur.fetchmany(batch_size)
+        if not batch:
+            return
+        yield batch
+
+
+# ====== Writers ======
+def write_csv(cur, out, batch_size=DEFAULT_BATCH_SIZE):
+    """Header + rows to a text stream; NULL becomes an empty field. Returns the row count."""
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow([d[0] for d in cur.description])
+    rows = 0
+    for batch in iter_batches(cur, batch_size):
+        writer.writerows(batch)
+        rows += len(batch)
+    return rows
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet / Arrow export needs pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def _arrow_type(pa, kinds):
+    """Arrow type for a column from the Python types of all its non-NULL values.
+
+    SQLite columns carry no declared type on a cursor, so the type comes from
+    the values: INTEGER stays int64 and only a column mixing INTEGER and REAL
+    values becomes float64. An all-NULL column is string; one mixing text
+    with other types is string too, with the other values written as text.
+    """
+    if kinds == {int}:
+        return pa.int64()
+    if kinds and kinds <= {int, float}:
+        return pa.float64()
+    if kinds == {bytes}:
+        return pa.binary()
+    return pa.string()
+
+
+def _spool_batches(batches, spool):
+    """Write batches to spool, returning the set of value types seen per column (None when no rows)"""
+    kinds = None
+    for batch in batches:
+        marshal.dump(batch, spool)
+        columns = [{type(v) for v in values} - {type(None)} for values in zip(*batch)]
+        kinds = columns if kinds is None else [seen | new for seen, new in zip(kinds, columns)]
+    return kinds
+
+
+def _read_spool(spool):
+    spool.seek(0)
+    while True:
+        try:
+            yield marshal.load(spool)
+        except EOFError:
+            return
+
+
+def _record_batch(pa, schema, batch):
+    columns = list(zip(*batch))
+    try:
+        # A value that doesn't fit its column (e.g. an integer beyond 2**53 in a float64 column) raises
+        arrays = [pa.array(_as_text(values) if field.type == pa.string() else values, type=field.type)
+                  for values, field in zip(columns, schema)]
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, TypeError, OverflowError) as e:
+        raise ValueError(f"Column values don't fit the export schema ({schema}): {e}") from e
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _as_text(values):
+    return [v if v is None or isinstance(v, str) else str(v) for v in values]
+
+
+def write_arrow(cur, out, fmt="parquet", batch_size=DEFAULT_BATCH_SIZE):
+    """Rows as Arrow record batches to a Parquet or Arrow IPC file (path or binary file).
+
+    Each batch becomes one Parquet row group / one IPC record batch.
+    Returns the row count.
+    """
+    pa = _import_pyarrow()
+    names = [d[0] for d in cur.description]
+    with tempfile.TemporaryFile() as spool:
+        kinds = _spool_batches(iter_batches(cur, batch_size), spool) or [set()] * len(names)
+        schema = pa.schema([(name, _arrow_type(pa, seen)) for name, seen in zip(names, kinds)])
+
+        if fmt == "parquet":
+            writer = pa.parquet.ParquetWriter(out, schema)
+        else:
+            writer = pa.ipc.new_file(out, schema)
+        rows = 0
+        with writer:  # an empty result still gets a valid file with the schema
+            for batch in _read_spool(spool):
+                writer.write_batch(_record_batch(pa, schema, batch))
+                rows += len(batch)
+    return rows
+
+
+def export_query(con, sql, out, fmt="csv", params=(), batch_size=DEFAULT_BATCH_SIZE):
+    """Run sql on con and stream its result to out. Returns the row count.
+
+    out is a path or a binary file object.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}")
+    cur = con.execute(sql, params)
+    if cur.description is None:
+        raise ValueError("Statement returns no rows to export")
+    if fmt != "csv":
+        return write_arrow(cur, out, fmt, batch_size)
+    if isinstance(out, (str, os.PathLike)):
+        with open(out, "w", newline="", encoding="utf-8") as f:
+            return write_csv(cur, f, batch_size)
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    try:
+        return write_csv(cur, text, batch_size)
+    finally:
+        text.detach()  # flushes, and leaves out open for the caller
+
+
+def export_db(db_file, sql, out, fmt="csv", params=(), batch_size=DEFAULT_BATCH_SIZE, timeout_s=None):
+    """export_query on a fresh read-only connection.
+
+    With timeout_s the export is cancelled (QueryTimeout) once it runs longer.
+    """
+    con = connect_readonly(db_file)
+    if timeout_s is not None:
+        deadline = time.monotonic() + timeout_s
+        con.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, PROGRESS_STEPS)
+    try:
+        return export_query(con, sql, out, fmt, params, batch_size)
+    except sqlite3.OperationalError as e:
+        if timeout_s is not None and "interrupted" in str(e):
+            raise QueryTimeout(f"Export cancelled after {timeout_s:g}s") from e
+        raise
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    from load_csv_to_sqlite import db_file
+
+    parser = argparse.ArgumentParser(description="Stream a table, predefined query or SQL statement "
+                                                 "to CSV / Parquet / Arrow")
+    parser.add_argument("source", nargs="?",
+                        help=f"table ({', '.join(EXPORT_TABLES)}) or predefined query name")
+    parser.add_argument("output", help="file to write; the format follows the extension unless --format is given")
+    parser.add_argument("--sql", help="export this SELECT statement instead of a table / predefined query")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), help="output format")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="rows fetched and written per batch (default: %(default)s)")
+    parser.add_argument("--db", default=db_file, help="SQLite file to read")
+    args = parser.parse_args()
+    if (args.sql is None) == (args.source is None):
+        parser.error("give either a source or --sql")
+
+    try:
+        sql = args.sql or source_sql(args.source)
+        fmt = args.format or format_for_path(args.output)
+    except ValueError as e:
+        parser.error(str(e))
+    start = time.perf_counter()
+    rows = export_db(args.db, sql, args.output, fmt, batch_size=args.batch_size)
+    print(f"Exported {rows} rows to {args.output} ({fmt}) in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,127 @@
+"""Offline geocoding and "within X km" proximity search.
+
+data/city_coordinates.csv is a bundled City -> Latitude / Longitude
+gazetteer; nothing is looked up over the network. The sample exports use
+made-up city names, so the bundled coordinates are synthetic as well
+(deterministic positions from benchmarks/synth_data.py); replace the file
+with a real gazetteer for real data and reload.
+
+Cities are indexed in an R*Tree (city_rtree). A proximity query takes the
+receiver's city, asks the R*Tree for the cities inside the bounding box of
+the radius, keeps those whose haversine distance is within it, and then
+fetches the open listings located in those cities through the Location
+index. Listings and receivers are placed at their city's coordinates.
+"""
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+# ====== Geo settings ======
+GAZETTEER_FILE = "city_coordinates.csv"
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+DEFAULT_RADIUS_KM = 25
+
+geo_schema_sql = """
+CREATE TABLE IF NOT EXISTS city_coordinates (
+    City TEXT PRIMARY KEY,
+    Latitude REAL NOT NULL,
+    Longitude REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS city_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon);
+"""
+
+receiver_location_sql = """
+SELECT r.City, c.Latitude, c.Longitude
+FROM receivers r LEFT JOIN city_coordinates c ON c.City = r.City
+WHERE r.Receiver_ID = ?;
+"""
+
+cities_in_box_sql = """
+SELECT c.City, c.Latitude, c.Longitude
+FROM city_rtree b JOIN city_coordinates c ON c.rowid = b.id
+WHERE b.max_lat >= ? AND b.min_lat <= ? AND b.max_lon >= ? AND b.min_lon <= ?;
+"""
+
+# Open listings (not expired, no Pending/Completed claim) in a JSON array of cities
+nearby_listings_sql = """
+SELECT f.Food_ID, f.Food_Name, f.Quantity, f.Expiry_Date, f.Location, f.Food_Type, f.Meal_Type
+FROM food_listings f
+WHERE f.Location IN (SELECT value FROM json_each(?))
+  AND f.Expiry_Date >= ?
+  AND NOT EXISTS (SELECT 1 FROM claims c
+                  WHERE c.Food_ID = f.Food_ID AND c.Status IN ('Pending', 'Completed'));
+"""
+
+# Ranking choices for nearby listings -> sort columns
+NEARBY_ORDERS = {
+    "Distance": (["distance_km", "Expiry_Date", "Quantity"], [True, True, False]),
+    "Expiry": (["Expiry_Date", "distance_km", "Quantity"], [True, True, False]),
+}
+
+
+def create_geo_tables(cur):
+    cur.executescript(geo_schema_sql)
+
+
+def load_gazetteer(cur, path):
+    """Replace city_coordinates and the R*Tree with the contents of the gazetteer CSV.
+
+    Returns the number of cities loaded, or 0 when the file does not exist.
+    """
+    if not os.path.exists(path):
+        return 0
+    df = pd.read_csv(path, usecols=["City", "Latitude", "Longitude"]).dropna()
+    df = df.drop_duplicates("City", keep="last")
+    cur.execute("BEGIN;")
+    cur.execute("DELETE FROM city_rtree;")
+    cur.execute("DELETE FROM city_coordinates;")
+    cur.executemany("INSERT INTO city_coordinates (City, Latitude, Longitude) VALUES (?,?,?)",
+                    df.astype(object).itertuples(index=False, name=None))
+    cur.execute("INSERT INTO city_rtree (id, min_lat, max_lat, min_lon, max_lon) "
+                "SELECT rowid, Latitude, Latitude, Longitude, Longitude FROM city_coordinates;")
+    cur.execute("COMMIT;")
+    return len(df)
+
+
+def bounding_box(lat, lon, radius_km):
+    """(min_lat, max_lat, min_lon, max_lon) enclosing the circle; no antimeridian wrap"""
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    d_lon = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    return lat - d_lat, lat + d_lat, lon - d_lon, lon + d_lon
+
+
+def box_params(lat, lon, radius_km):
+    """Parameters for cities_in_box_sql"""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    return [min_lat, max_lat, min_lon, max_lon]
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance from (lat, lon) to each of lats / lons, vectorized"""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(np.asarray(lats, dtype=float)), np.radians(np.asarray(lons, dtype=float))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def cities_within(candidates, lat, lon, radius_km):
+    """Bounding-box candidates narrowed to the radius: City, distance_km (nearest first)"""
+    distance = haversine_km(lat, lon, candidates["Latitude"], candidates["Longitude"])
+    near = candidates.assign(distance_km=distance.round(2))[distance <= radius_km]
+    return near[["City", "distance_km"]].sort_values("distance_km").reset_index(drop=True)
+
+
+def city_list_param(cities):
+    """JSON array parameter for nearby_listings_sql"""
+    return json.dumps(list(cities))
+
+
+def rank_nearby(listings, cities, order="Distance"):
+    """Attach distance_km to listings and sort them by NEARBY_ORDERS[order]"""
+    columns, ascending = NEARBY_ORDERS[order]
+    ranked = listings.merge(cities, left_on="Location", right_on="City").drop(columns="City")
+    return ranked.sort_values(columns, ascending=ascending, kind="mergesort").reset_index(drop=True)
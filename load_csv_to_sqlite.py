@@ -1,17 +1,36 @@
+import argparse
+import hashlib
 import sqlite3
 import pandas as pd
 import os
+from contextlib import contextmanager
+
+from rollups import create_rollup_tables, create_rollup_triggers, drop_rollup_triggers, rebuild_rollups
+from search import create_search_index, create_search_triggers, drop_search_triggers, rebuild_search_index
+from geo import GAZETTEER_FILE, create_geo_tables, load_gazetteer
+from expiry_watch import (create_expiry_watch_tables, create_expiry_watch_triggers, drop_expiry_watch_triggers,
+                          reset_expiry_watch)
+from row_changes import (create_row_changes_table, create_row_changes_triggers, drop_row_changes_triggers,
+                         reset_row_changes)
 
 # ====== Paths to your CSVs ======
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-providers_csv = os.path.join(BASE_DIR, "data", "providers_data.csv")
-receivers_csv = os.path.join(BASE_DIR, "data", "receivers_data.csv")
-food_listings_csv = os.path.join(BASE_DIR, "data", "food_listings_data.csv")
-claims_csv = os.path.join(BASE_DIR, "data", "claims_data.csv")
+DATA_DIR = os.path.join(BASE_DIR, "data")
+providers_csv = os.path.join(DATA_DIR, "providers_data.csv")
+receivers_csv = os.path.join(DATA_DIR, "receivers_data.csv")
+food_listings_csv = os.path.join(DATA_DIR, "food_listings_data.csv")
+claims_csv = os.path.join(DATA_DIR, "claims_data.csv")
 
 # ====== Output DB file ======
 db_file = os.path.join(BASE_DIR, "food_wastage.db")
 
+# Bump whenever the schema or the stored data format changes, and add the
+# MIGRATIONS entry that upgrades existing DB files to it in place.
+SCHEMA_VERSION = 11
+# user_version while build_db() reloads from the CSVs; seen on a file
+# whose load never finished
+LOADING_VERSION = -1
+
 # ====== Create schema ======
 schema_sql = """
 PRAGMA foreign_keys = ON;
@@ -55,49 +74,592 @@ CREATE TABLE IF NOT EXISTS claims (
     FOREIGN KEY (Food_ID) REFERENCES food_listings(Food_ID) ON DELETE CASCADE,
     FOREIGN KEY (Receiver_ID) REFERENCES receivers(Receiver_ID) ON DELETE CASCADE
 );
+
+-- One row per CSV file last loaded, used to skip unchanged files
+CREATE TABLE IF NOT EXISTS load_manifest (
+    File TEXT PRIMARY KEY,
+    Size INTEGER NOT NULL,
+    Mtime REAL NOT NULL,
+    Sha256 TEXT NOT NULL,
+    Loaded_At TEXT NOT NULL
+);
+"""
+
+# ====== Indexes ======
+# Expiry_Date is stored as ISO-8601 text (YYYY-MM-DD) so it sorts and compares
+# correctly as plain text and range predicates can use these indexes.
+# Quantity is DESC to match the grid's (Expiry_Date, Quantity DESC, Food_ID) order.
+INDEXES = {
+    "idx_food_listings_filters":
+        "food_listings (Location, Provider_Type, Food_Type, Meal_Type, Expiry_Date, Quantity DESC)",
+    # grid filtered by City (with or without the other filters): pages are
+    # read in sort order instead of going through a temp B-tree sort
+    "idx_food_listings_location_expiry":
+        "food_listings (Location, Expiry_Date, Quantity DESC)",
+    "idx_food_listings_expiry":
+        "food_listings (Expiry_Date, Quantity DESC)",
+    "idx_providers_city_name":
+        "providers (City, Name)",
+    # same-city receivers for expiry alerts
+    "idx_receivers_city":
+        "receivers (City)",
+    # "is this listing already claimed" lookups (allocation, rollup triggers)
+    "idx_claims_food_status":
+        "claims (Food_ID, Status)",
+}
+
+# ====== Load settings ======
+# Tables in foreign-key order, with the CSV file each one is loaded from
+LOAD_ORDER = [
+    ("providers", "providers_data.csv"),
+    ("receivers", "receivers_data.csv"),
+    ("food_listings", "food_listings_data.csv"),
+    ("claims", "claims_data.csv"),
+]
+
+PRIMARY_KEYS = {
+    "providers": "Provider_ID",
+    "receivers": "Receiver_ID",
+    "food_listings": "Food_ID",
+    "claims": "Claim_ID",
+}
+
+TABLE_COLUMNS = {
+    "providers": ["Provider_ID", "Name", "Type", "Address", "City", "Contact"],
+    "receivers": ["Receiver_ID", "Name", "Type", "City", "Contact"],
+    "food_listings": ["Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Provider_ID",
+                      "Provider_Type", "Location", "Food_Type", "Meal_Type"],
+    "claims": ["Claim_ID", "Food_ID", "Receiver_ID", "Status", "Timestamp"],
+}
+
+# Rows read from a CSV and written per transaction; bounds loader memory
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Bulk-load tuning: no fsync per commit, a 64 MB page cache and temp tables
+# in memory. The DB stays in WAL: leaving it needs exclusive access, which a
+# running dashboard's connection pool never gives up. A process killed
+# mid-load leaves user_version at LOADING_VERSION and the next build_db()
+# reloads; an OS crash or power loss with synchronous OFF can tear the
+# file, which build_db() replaces once it fails an integrity check.
+LOAD_PRAGMAS = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = OFF;
+PRAGMA cache_size = -65536;
+PRAGMA temp_store = MEMORY;
+"""
+
+# Settings restored once the load is done
+POST_LOAD_PRAGMAS = """
+PRAGMA synchronous = NORMAL;
+"""
+
+# How long the loader waits on a write lock held by another connection
+# (e.g. the dashboard's writer) before giving up
+LOAD_BUSY_TIMEOUT_S = 30
+# How long a build / migration / update waits for another loader working on
+# the same DB (the CLI, or a dashboard's startup bootstrap) to finish
+LOADER_LOCK_TIMEOUT_S = 600
+
+# Claims are staged first and only rows whose Food_ID and Receiver_ID exist
+# are copied over, so the foreign-key check runs inside SQLite per chunk.
+STAGE_FILTERS = {
+    "claims": """EXISTS (SELECT 1 FROM food_listings f WHERE f.Food_ID = s.Food_ID)
+  AND EXISTS (SELECT 1 FROM receivers r WHERE r.Receiver_ID = s.Receiver_ID)""",
+}
+
+
+# CSV exports use M/D/YYYY (and M/D/YYYY H:MM for claim timestamps)
+CSV_DATE_FORMAT = "%m/%d/%Y"
+CSV_TIMESTAMP_FORMAT = "%m/%d/%Y %H:%M"
+ISO_DATE_FORMAT = "%Y-%m-%d"
+ISO_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+
+DATE_COLUMNS = {
+    "food_listings": ("Expiry_Date", CSV_DATE_FORMAT, ISO_DATE_FORMAT),
+    "claims": ("Timestamp", CSV_TIMESTAMP_FORMAT, ISO_TIMESTAMP_FORMAT),
+}
+
+
+def normalize_dates(df, column, csv_fmt, iso_fmt):
+    """Rewrite a date column from the CSVs into sortable ISO-8601 text"""
+    df[column] = pd.to_datetime(df[column], format=csv_fmt).dt.strftime(iso_fmt)
+    return df
+
+
+def schema_version(path=db_file):
+    """Return the schema version stored in an existing DB file (0 if unknown or unreadable)"""
+    con = sqlite3.connect(path)
+    try:
+        return con.execute("PRAGMA user_version;").fetchone()[0]
+    except sqlite3.DatabaseError:  # not a database / corrupt: needs a rebuild
+        return 0
+    finally:
+        con.close()
+
+
+def db_is_intact(path):
+    """True unless SQLite finds the file unreadable or damaged (PRAGMA quick_check)"""
+    con = sqlite3.connect(path)
+    try:
+        return con.execute("PRAGMA quick_check(1);").fetchone()[0] == "ok"
+    except sqlite3.DatabaseError:
+        return False
+    finally:
+        con.close()
+
+
+def remove_db_files(path):
+    """Delete a DB file together with its journal / WAL side files"""
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def create_indexes(cur):
+    for name, target in INDEXES.items():
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target};")
+
+
+def drop_indexes(cur):
+    for name in INDEXES:
+        cur.execute(f"DROP INDEX IF EXISTS {name};")
+
+
+def read_csv_chunks(path, table, chunk_size):
+    """Yield lists of row tuples from a CSV, chunk_size rows at a time"""
+    columns = TABLE_COLUMNS[table]
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        if table in DATE_COLUMNS:
+            normalize_dates(chunk, *DATE_COLUMNS[table])
+        chunk = chunk[columns].astype(object)
+        # Missing values become NULL; astype(object) also turns numpy ints into Python ints
+        chunk = chunk.where(chunk.notna(), None)
+        yield list(chunk.itertuples(index=False, name=None))
+
+
+def insert_sql(table, target=None):
+    columns = TABLE_COLUMNS[table]
+    return (f"INSERT INTO {target or table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))});")
+
+
+def staged_rows_sql(table):
+    """SELECT over the staging table, restricted to rows passing STAGE_FILTERS"""
+    columns = ", ".join(f"s.{c}" for c in TABLE_COLUMNS[table])
+    where = STAGE_FILTERS.get(table, "1")
+    return f"SELECT {columns} FROM temp.stage_{table} s WHERE {where}"
+
+
+def upsert_sql(table):
+    """Insert staged rows, updating existing primary keys only when a column changed"""
+    pk = PRIMARY_KEYS[table]
+    columns = TABLE_COLUMNS[table]
+    others = [c for c in columns if c != pk]
+    return f"""
+INSERT INTO {table} ({', '.join(columns)})
+{staged_rows_sql(table)}
+ON CONFLICT ({pk}) DO UPDATE SET {', '.join(f"{c} = excluded.{c}" for c in others)}
+WHERE ({', '.join(f"{table}.{c}" for c in others)}) IS NOT ({', '.join(f"excluded.{c}" for c in others)});
 """
 
-def build_db(force=False):
-    """Create and populate database if not exists or if force=True"""
-    if os.path.exists(db_file) and not force:
-        return db_file  # DB already exists
 
-    con = sqlite3.connect(db_file)
-    cur = con.cursor()
+def create_stage(cur, table):
+    cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS stage_{table} AS SELECT * FROM {table} WHERE 0;")
+    cur.execute(f"DELETE FROM temp.stage_{table};")
+
+
+def load_table(cur, table, path, chunk_size):
+    """Stream one CSV into its table, one transaction per chunk.
+
+    Returns (rows_read, rows_skipped).
+    """
+    rows_read = rows_skipped = 0
+    staged = table in STAGE_FILTERS
+    if staged:
+        create_stage(cur, table)
+
+    for rows in read_csv_chunks(path, table, chunk_size):
+        rows_read += len(rows)
+        cur.execute("BEGIN;")
+        if staged:
+            cur.executemany(insert_sql(table, f"temp.stage_{table}"), rows)
+            cur.execute(f"INSERT INTO {table} ({', '.join(TABLE_COLUMNS[table])}) {staged_rows_sql(table)};")
+            rows_skipped += len(rows) - cur.rowcount
+            cur.execute(f"DELETE FROM temp.stage_{table};")
+        else:
+            cur.executemany(insert_sql(table), rows)
+        cur.execute("COMMIT;")
+
+    return rows_read, rows_skipped
+
+
+def upsert_table(cur, table, path, chunk_size):
+    """Stream one CSV into its table as an upsert keyed on the primary key.
+
+    Returns a dict with inserted / updated / skipped (unchanged) / invalid
+    (foreign key mismatch) row counts.
+    """
+    pk = PRIMARY_KEYS[table]
+    counts = {"inserted": 0, "updated": 0, "skipped": 0, "invalid": 0}
+    create_stage(cur, table)
+
+    for rows in read_csv_chunks(path, table, chunk_size):
+        cur.execute("BEGIN;")
+        cur.executemany(insert_sql(table, f"temp.stage_{table}"), rows)
+        valid, new = cur.execute(f"""
+            SELECT COUNT(*),
+                   SUM(NOT EXISTS (SELECT 1 FROM {table} t WHERE t.{pk} = v.{pk}))
+            FROM ({staged_rows_sql(table)}) v;""").fetchone()
+        cur.execute(upsert_sql(table))
+        changed = cur.rowcount
+        cur.execute(f"DELETE FROM temp.stage_{table};")
+        cur.execute("COMMIT;")
+
+        new = new or 0
+        counts["inserted"] += new
+        counts["updated"] += changed - new
+        counts["skipped"] += valid - changed
+        counts["invalid"] += len(rows) - valid
+
+    return counts
+
+
+def file_fingerprint(path):
+    """(size, mtime, sha256) of a file, hashed in 1 MB blocks"""
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return stat.st_size, stat.st_mtime, digest.hexdigest()
+
+
+def record_manifest(cur, filename, fingerprint):
+    cur.execute(
+        """INSERT INTO load_manifest (File, Size, Mtime, Sha256, Loaded_At)
+           VALUES (?, ?, ?, ?, datetime('now'))
+           ON CONFLICT (File) DO UPDATE SET Size = excluded.Size, Mtime = excluded.Mtime,
+               Sha256 = excluded.Sha256, Loaded_At = excluded.Loaded_At;""",
+        (filename, *fingerprint),
+    )
+
+
+def file_unchanged(cur, filename, path):
+    """Check a CSV against the manifest: size+mtime first, then content hash.
+
+    Returns (unchanged, fingerprint); fingerprint is None when size and mtime
+    already match so the file never has to be read.
+    """
+    row = cur.execute("SELECT Size, Mtime, Sha256 FROM load_manifest WHERE File = ?;", (filename,)).fetchone()
+    stat = os.stat(path)
+    if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+        return True, None
+    fingerprint = file_fingerprint(path)
+    return bool(row and row[2] == fingerprint[2]), fingerprint
+
+
+# ====== Migrations ======
+# Existing DBs are upgraded in place, never reloaded from the CSVs, so rows
+# entered through the app (listings, claims, allocations) survive a schema
+# bump. Every step is idempotent. Derived tables get their new triggers
+# before the rebuild, so a write landing in between is covered by the rebuild.
+def _migrate_iso_dates(cur, data_dir):
+    """Rewrite M/D/YYYY dates stored by the original loader as ISO-8601 text"""
+    for table, (column, csv_fmt, iso_fmt) in DATE_COLUMNS.items():
+        rows = cur.execute(f"SELECT rowid, {column} FROM {table} WHERE {column} LIKE '%/%';").fetchall()
+        if not rows:
+            continue
+        rowids, values = zip(*rows)
+        iso = pd.to_datetime(pd.Series(values), format=csv_fmt, errors="coerce").dt.strftime(iso_fmt)
+        updates = [(value, rowid) for value, rowid in zip(iso, rowids) if isinstance(value, str)]
+        if len(updates) < len(rows):
+            print(f"⚠ Left {len(rows) - len(updates)} unreadable {table}.{column} values as they were")
+        cur.execute("BEGIN;")
+        cur.executemany(f"UPDATE {table} SET {column} = ? WHERE rowid = ?;", updates)
+        cur.execute("COMMIT;")
+
+
+def _migrate_indexes(cur, data_dir):
+    drop_indexes(cur)  # picks up definitions changed under the same name
+    create_indexes(cur)
+
+
+def _migrate_rollups(cur, data_dir):
+    drop_rollup_triggers(cur)
+    create_rollup_tables(cur)
+    create_rollup_triggers(cur)
+    rebuild_rollups(cur)
+
+
+def _migrate_search(cur, data_dir):
+    drop_search_triggers(cur)
+    create_search_index(cur)
+    create_search_triggers(cur)
+    rebuild_search_index(cur)
+
+
+def _migrate_geo(cur, data_dir):
+    create_geo_tables(cur)
+    gazetteer = os.path.join(data_dir, GAZETTEER_FILE)
+    if load_gazetteer(cur, gazetteer):
+        record_manifest(cur, GAZETTEER_FILE, file_fingerprint(gazetteer))
+
+
+def _migrate_expiry_watch(cur, data_dir):
+    drop_expiry_watch_triggers(cur)
+    create_expiry_watch_tables(cur)
+    create_expiry_watch_triggers(cur)
+    reset_expiry_watch(cur)  # running watchers reload
+
+
+def _migrate_row_changes(cur, data_dir):
+    drop_row_changes_triggers(cur)
+    create_row_changes_table(cur)
+    create_row_changes_triggers(cur)
+    reset_row_changes(cur)  # running snapshots reload
+
+
+# MIGRATIONS[v] upgrades a version v-1 DB to version v
+MIGRATIONS = {
+    1: (_migrate_iso_dates, _migrate_indexes),  # ISO-8601 dates, listing filter / expiry indexes
+    2: (_migrate_rollups,),                     # claim rollups
+    3: (_migrate_indexes,),                     # Quantity DESC in listing indexes, provider contacts
+    4: (_migrate_indexes,),                     # claims (Food_ID, Status) for allocation
+    5: (_migrate_rollups,),                     # hourly / daily claim series
+    6: (_migrate_search,),                      # FTS5 search index
+    7: (_migrate_geo,),                         # gazetteer + R*Tree
+    8: (_migrate_expiry_watch,),                # expiry alerts outbox and change queue
+    9: (_migrate_indexes,),                     # listings by (Location, Expiry_Date)
+    10: (_migrate_expiry_watch,),               # AUTOINCREMENT change queue
+    11: (_migrate_row_changes,),                # changed-row log for snapshot deltas
+}
+
+
+def migrate_db(cur, data_dir=None):
+    """Upgrade the DB behind cur to SCHEMA_VERSION in place, one MIGRATIONS entry per version.
+
+    user_version is set after each version, so an interrupted migration
+    resumes where it stopped.
+    """
+    data_dir = data_dir or DATA_DIR
+    version = cur.execute("PRAGMA user_version;").fetchone()[0]
+    cur.executescript(schema_sql)  # tables added without a version bump, e.g. load_manifest
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        for step in MIGRATIONS[target]:
+            step(cur, data_dir)
+        cur.execute(f"PRAGMA user_version = {target};")
+    cur.execute("ANALYZE;")
+
+
+@contextmanager
+def loader_lock(db_path, timeout_s=LOADER_LOCK_TIMEOUT_S):
+    """Held for a whole build, migration or update, so two loaders never work on db_path at once.
+
+    The loader commits chunk by chunk, so the DB's own write lock comes and
+    goes; this is an exclusive transaction on the side file <db_path>.lock
+    instead, which SQLite releases when the holder finishes or dies.
+    """
+    con = sqlite3.connect(db_path + ".lock", timeout=timeout_s, isolation_level=None)
+    try:
+        try:
+            con.execute("BEGIN EXCLUSIVE;")
+        except sqlite3.OperationalError as e:
+            raise sqlite3.OperationalError(f"Another loader kept working on {db_path} for {timeout_s}s; "
+                                           f"retry once it is done ({e})") from e
+        yield
+    finally:
+        con.close()
+
+
+@contextmanager
+def _load_connection(db_path):
+    """Autocommit cursor for the loader; a write lock held too long becomes a clear error"""
+    con = sqlite3.connect(db_path, isolation_level=None, timeout=LOAD_BUSY_TIMEOUT_S)
+    try:
+        yield con.cursor()
+    except sqlite3.OperationalError as e:
+        if "locked" not in str(e):
+            raise
+        raise sqlite3.OperationalError(f"{db_path} stayed locked by another writer for "
+                                       f"{LOAD_BUSY_TIMEOUT_S}s; retry once it is done ({e})") from e
+    finally:
+        con.close()
+
+
+def _load_db(cur, chunk_size, data_dir):
+    """Clear the DB behind cur and reload it from the CSVs in data_dir"""
+    cur.executescript(LOAD_PRAGMAS)
     cur.executescript(schema_sql)
+    create_rollup_tables(cur)
+    create_search_index(cur)
+    create_geo_tables(cur)
+    create_expiry_watch_tables(cur)
+    create_row_changes_table(cur)
+    cur.execute(f"PRAGMA user_version = {LOADING_VERSION};")
 
     # ---- Clear old rows (but keep schema) ----
-    for table in ["claims", "food_listings", "providers", "receivers"]:
+    drop_indexes(cur)
+    drop_rollup_triggers(cur)
+    drop_search_triggers(cur)
+    drop_expiry_watch_triggers(cur)
+    drop_row_changes_triggers(cur)
+    cur.execute("BEGIN;")
+    for table, _ in reversed(LOAD_ORDER):
         cur.execute(f"DELETE FROM {table};")
+    cur.execute("COMMIT;")
+
+    # ---- Stream fresh CSV data, parents before children ----
+    for table, filename in LOAD_ORDER:
+        path = os.path.join(data_dir, filename)
+        _, skipped = load_table(cur, table, path, chunk_size)
+        if skipped:
+            print(f"⚠ Skipped {skipped} invalid claim rows (foreign key mismatch)")
+        record_manifest(cur, filename, file_fingerprint(path))
 
-    # ---- Insert fresh CSV data ----
-    providers_df = pd.read_csv(providers_csv)
-    receivers_df = pd.read_csv(receivers_csv)
-    food_df = pd.read_csv(food_listings_csv)
-    claims_df = pd.read_csv(claims_csv)
+    gazetteer = os.path.join(data_dir, GAZETTEER_FILE)
+    if load_gazetteer(cur, gazetteer):
+        record_manifest(cur, GAZETTEER_FILE, file_fingerprint(gazetteer))
 
-    # Insert providers, receivers, food listings first
-    providers_df.to_sql("providers", con, if_exists="append", index=False)
-    receivers_df.to_sql("receivers", con, if_exists="append", index=False)
-    food_df.to_sql("food_listings", con, if_exists="append", index=False)
+    create_indexes(cur)
+    rebuild_rollups(cur)
+    create_rollup_triggers(cur)
+    rebuild_search_index(cur)
+    create_search_triggers(cur)
+    reset_expiry_watch(cur)
+    create_expiry_watch_triggers(cur)
+    reset_row_changes(cur)
+    create_row_changes_triggers(cur)
+    cur.execute("ANALYZE;")
+    cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
+    cur.executescript(POST_LOAD_PRAGMAS)
 
-    # ---- Validate claims foreign keys ----
-    valid_claims = claims_df[
-        claims_df["Receiver_ID"].isin(receivers_df["Receiver_ID"]) &
-        claims_df["Food_ID"].isin(food_df["Food_ID"])
-    ]
 
-    if len(valid_claims) < len(claims_df):
-        print(f"⚠ Skipped {len(claims_df) - len(valid_claims)} invalid claim rows (foreign key mismatch)")
+def build_db(force=False, chunk_size=DEFAULT_CHUNK_SIZE, db_path=None, data_dir=None):
+    """Bring the database up to SCHEMA_VERSION and return its path.
 
-    valid_claims.to_sql("claims", con, if_exists="append", index=False)
+    A missing DB is loaded from the CSVs, as is any DB with force=True
+    (dropping rows entered through the app). CSVs are streamed in chunks of
+    chunk_size rows, so memory use does not grow with the size of the input
+    files. An existing DB on an older schema is upgraded in place by
+    migrate_db(). While another loader works on the same DB this waits for
+    it (loader_lock) and then only does what is still left to do.
+    """
+    db_path = db_path or db_file
+    data_dir = data_dir or DATA_DIR
+    with loader_lock(db_path):
+        _build_db(force, chunk_size, db_path, data_dir)
+    return db_path
 
-    con.commit()
-    con.close()
-    return db_file
+
+def _build_db(force, chunk_size, db_path, data_dir):
+    """build_db() for a caller already holding loader_lock"""
+    reload = force or not os.path.exists(db_path)
+    if not reload:
+        version = schema_version(db_path)
+        if version == SCHEMA_VERSION:
+            return  # DB already exists and is up to date
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"{db_path} has schema version {version}, newer than this code ({SCHEMA_VERSION})")
+        # A file torn by a crash can't be migrated or cleared row by row: start from scratch
+        if not db_is_intact(db_path):
+            print(f"⚠ {db_path} is damaged, recreating it")
+            remove_db_files(db_path)
+            reload = True
+        elif version == LOADING_VERSION:
+            print(f"⚠ {db_path} holds an unfinished load, reloading it")
+            reload = True
+
+    with _load_connection(db_path) as cur:
+        if reload:
+            _load_db(cur, chunk_size, data_dir)
+        else:
+            migrate_db(cur, data_dir)
+
+
+def update_db(chunk_size=DEFAULT_CHUNK_SIZE, db_path=None, data_dir=None):
+    """Apply the CSVs to an existing database as an incremental upsert.
+
+    Files whose size/mtime or content hash match the manifest are skipped
+    entirely; otherwise rows are upserted by primary key and rows whose
+    columns did not change are left untouched. Rows missing from the CSVs
+    are not deleted. A DB on an older schema version is migrated in place
+    first; a missing one is built from the CSVs by build_db() and None is
+    returned.
+
+    Returns {table: {"inserted", "updated", "skipped", "invalid", "file_unchanged"}}.
+    """
+    db_path = db_path or db_file
+    data_dir = data_dir or DATA_DIR
+    with loader_lock(db_path):
+        if not os.path.exists(db_path):
+            _build_db(False, chunk_size, db_path, data_dir)
+            return None
+        _build_db(False, chunk_size, db_path, data_dir)  # no-op unless a migration is due
+        return _update_db(chunk_size, db_path, data_dir)
+
+
+def _update_db(chunk_size, db_path, data_dir):
+    with _load_connection(db_path) as cur:
+        cur.executescript(schema_sql)
+        create_rollup_tables(cur)
+        create_rollup_triggers(cur)  # keep rollups and the search index current while upserting
+        create_search_index(cur)
+        create_search_triggers(cur)
+        create_expiry_watch_tables(cur)
+        create_expiry_watch_triggers(cur)  # upserted listings / claims are queued for the expiry watch
+        create_row_changes_table(cur)
+        create_row_changes_triggers(cur)  # and logged for the snapshot
+
+        stats = {}
+        for table, filename in LOAD_ORDER:
+            path = os.path.join(data_dir, filename)
+            unchanged, fingerprint = file_unchanged(cur, filename, path)
+            if unchanged:
+                stats[table] = {"inserted": 0, "updated": 0, "skipped": 0, "invalid": 0, "file_unchanged": True}
+                if fingerprint:
+                    record_manifest(cur, filename, fingerprint)  # same content, new mtime
+                continue
+            stats[table] = dict(upsert_table(cur, table, path, chunk_size), file_unchanged=False)
+            record_manifest(cur, filename, fingerprint)
+
+        # The gazetteer is small: reload it whole when it changed
+        create_geo_tables(cur)
+        gazetteer = os.path.join(data_dir, GAZETTEER_FILE)
+        if os.path.exists(gazetteer):
+            unchanged, fingerprint = file_unchanged(cur, GAZETTEER_FILE, gazetteer)
+            if not unchanged:
+                load_gazetteer(cur, gazetteer)
+            if fingerprint:
+                record_manifest(cur, GAZETTEER_FILE, fingerprint)
+
+    return stats
 
 
 if __name__ == "__main__":
-    print("Rebuilding database...")
-    build_db(force=True)
-    print(f"Database created at {db_file}")
+    parser = argparse.ArgumentParser(description="Load the CSV exports into SQLite")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="rows per insert batch/transaction (default: %(default)s)")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="directory holding the *_data.csv files")
+    parser.add_argument("--db", default=db_file, help="SQLite file to build")
+    parser.add_argument("--incremental", action="store_true",
+                        help="upsert changed rows into the existing DB instead of rebuilding it")
+    parser.add_argument("--force", action="store_true",
+                        help="reload every table from the CSVs, dropping rows entered through the app")
+    args = parser.parse_args()
+
+    if args.incremental:
+        print("Updating database...")
+        stats = update_db(chunk_size=args.chunk_size, db_path=args.db, data_dir=args.data_dir)
+        if stats is None:
+            print(f"No database found, built {args.db} from the CSVs")
+        else:
+            for table, counts in stats.items():
+                if counts["file_unchanged"]:
+                    print(f"{table}: file unchanged, skipped")
+                else:
+                    print(f"{table}: {counts['inserted']} inserted, {counts['updated']} updated, "
+                          f"{counts['skipped']} unchanged, {counts['invalid']} invalid")
+    else:
+        print("Reloading database from the CSVs..." if args.force else "Building / migrating database...")
+        path = build_db(force=args.force, chunk_size=args.chunk_size, db_path=args.db, data_dir=args.data_dir)
+        print(f"Database at {path} is on schema version {SCHEMA_VERSION}")
@@ -0,0 +1,92 @@
+"""Keyset pagination for the dashboard grids.
+
+Pages are addressed by the sort key of their first row instead of OFFSET,
+so fetching any page walks an index in sort order from that row instead of
+sorting the matches. Filters the index doesn't lead with only skip rows
+along the way.
+"Jump to page N" uses page boundaries: the sort key of every page_size-th
+row, computed in one index-only pass and cached like any other query.
+"""
+
+# ====== Page size choices offered in the UI ======
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def _plain(value):
+    """numpy scalars (e.g. from a DataFrame row) -> Python values sqlite3 can bind"""
+    return value.item() if hasattr(value, "item") else value
+
+
+class KeysetPager:
+    """Builds count / boundary / page queries for one filtered, sorted table.
+
+    sort_keys is a list of (column, "ASC" | "DESC") that must end in a unique
+    column so every row has a distinct position. filters is a list of
+    (column, value) equality filters.
+    """
+
+    def __init__(self, table, columns, sort_keys, filters=None):
+        self.table = table
+        self.columns = list(columns)
+        self.sort_keys = list(sort_keys)
+        self.filters = list(filters or [])
+
+    @property
+    def key_columns(self):
+        return [col for col, _ in self.sort_keys]
+
+    def _where(self):
+        clauses = [f"{col} = ?" for col, _ in self.filters] or ["1=1"]
+        return " AND ".join(clauses), [value for _, value in self.filters]
+
+    def _order_by(self):
+        return ", ".join(f"{col} {direction}" for col, direction in self.sort_keys)
+
+    def _from_key(self, start_key):
+        """Predicate for rows at or after start_key in sort order"""
+        sql, params = "", []
+        for i, (col, direction) in reversed(list(enumerate(self.sort_keys))):
+            last = i == len(self.sort_keys) - 1
+            op = (">" if direction == "ASC" else "<") + ("=" if last else "")
+            value = _plain(start_key[i])
+            if last:
+                sql, params = f"{col} {op} ?", [value]
+            else:
+                sql = f"{col} {op} ? OR ({col} = ? AND ({sql}))"
+                params = [value, value] + params
+        # Redundant range on the leading key so SQLite walks the index from
+        # start_key in sort order instead of expanding the OR and sorting
+        col, direction = self.sort_keys[0]
+        lead = _plain(start_key[0])
+        return f"{col} {'>=' if direction == 'ASC' else '<='} ? AND ({sql})", [lead] + params
+
+    def count_query(self):
+        where, params = self._where()
+        return f"SELECT COUNT(*) AS total FROM {self.table} WHERE {where};", params
+
+    def boundaries_query(self, page_size):
+        """Sort key of the first row of every page, in page order"""
+        keys = ", ".join(self.key_columns)
+        where, params = self._where()
+        sql = f"""
+SELECT {keys} FROM (
+    SELECT {keys}, ROW_NUMBER() OVER (ORDER BY {self._order_by()}) AS rn
+    FROM {self.table} WHERE {where}
+) WHERE (rn - 1) % ? = 0 ORDER BY rn;"""
+        return sql, params + [page_size]
+
+    def page_query(self, start_key, page_size):
+        """Rows of the page starting at start_key (None for the first page)"""
+        where, params = self._where()
+        if start_key is not None:
+            key_sql, key_params = self._from_key(start_key)
+            where = f"{where} AND ({key_sql})"
+            params = params + key_params
+        sql = (f"SELECT {', '.join(self.columns)} FROM {self.table} WHERE {where} "
+               f"ORDER BY {self._order_by()} LIMIT ?;")
+        return sql, params + [page_size]
+
+    def all_query(self):
+        """Every filtered row in sort order, for exports"""
+        where, params = self._where()
+        return f"SELECT {', '.join(self.columns)} FROM {self.table} WHERE {where} ORDER BY {self._order_by()};", params
@@ -0,0 +1,132 @@
+"""Per-statement query profiling for run_query / run_execute.
+
+Every database call is timed and its SQLite VM step count is sampled with a
+progress handler. Durations are kept per distinct statement in a rolling
+window for p50/p95/p99, the query plan is captured the first time a
+statement is seen, and each call can optionally be appended to a JSON-lines
+trace file for offline analysis.
+"""
+import json
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# ====== Profiler settings ======
+WINDOW = 500          # most recent calls kept per statement for percentiles
+STEP_INTERVAL = 1000  # progress handler granularity in VM instructions
+
+
+def normalize_sql(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class QueryProfiler:
+    def __init__(self, window=WINDOW, step_interval=STEP_INTERVAL, trace_path=None):
+        self.window = window
+        self.step_interval = step_interval
+        self.trace_path = trace_path
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._plans = {}
+
+    def profile(self, con, sql, params, fn, kind="read"):
+        """Run fn(con) for statement sql on con and record it.
+
+        fn returns a DataFrame (rows = its length) or a cursor (rows =
+        rowcount). The progress handler is removed again afterwards.
+        """
+        steps = [0]
+
+        def tick():
+            steps[0] += 1
+            return 0
+
+        key = normalize_sql(sql)
+        with self._lock:
+            need_plan = key not in self._plans
+        if need_plan:
+            self._capture_plan(con, key, sql, params)
+
+        con.set_progress_handler(tick, self.step_interval)
+        start = time.perf_counter()
+        try:
+            result = fn(con)
+        finally:
+            elapsed = time.perf_counter() - start
+            con.set_progress_handler(None, 0)
+
+        rows = len(result) if hasattr(result, "__len__") else getattr(result, "rowcount", -1)
+        self.record(key, kind, elapsed, rows, steps[0] * self.step_interval, params)
+        return result
+
+    def _capture_plan(self, con, key, sql, params):
+        try:
+            plan = [row[3] for row in con.execute(f"EXPLAIN QUERY PLAN {sql}", params or []).fetchall()]
+        except Exception as e:
+            plan = [f"(no plan: {e})"]
+        with self._lock:
+            self._plans[key] = plan
+
+    def record(self, key, kind, elapsed, rows, vm_steps, params=None):
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                entry = self._stats[key] = {
+                    "kind": kind, "calls": 0,
+                    "durations": deque(maxlen=self.window),
+                    "rows": deque(maxlen=self.window),
+                    "vm_steps": deque(maxlen=self.window),
+                }
+            entry["calls"] += 1
+            entry["durations"].append(elapsed)
+            entry["rows"].append(rows)
+            entry["vm_steps"].append(vm_steps)
+
+            if self.trace_path:
+                event = {
+                    "ts": datetime.now().isoformat(timespec="milliseconds"),
+                    "kind": kind, "sql": key, "params": list(params or []),
+                    "elapsed_ms": round(elapsed * 1000, 3), "rows": rows, "vm_steps": vm_steps,
+                }
+                with open(self.trace_path, "a") as fh:
+                    fh.write(json.dumps(event, default=str) + "\n")
+
+    def summary(self):
+        """One dict per statement with call count and rolling p50/p95/p99 (ms)"""
+        with self._lock:
+            items = [(key, dict(entry, durations=list(entry["durations"]), rows=list(entry["rows"]),
+                                vm_steps=list(entry["vm_steps"])))
+                     for key, entry in self._stats.items()]
+            plans = dict(self._plans)
+
+        summary = []
+        for key, entry in items:
+            durations = sorted(entry["durations"])
+            summary.append({
+                "statement": key,
+                "kind": entry["kind"],
+                "calls": entry["calls"],
+                "p50_ms": percentile(durations, 50) * 1000,
+                "p95_ms": percentile(durations, 95) * 1000,
+                "p99_ms": percentile(durations, 99) * 1000,
+                "max_ms": durations[-1] * 1000,
+                "avg_rows": sum(entry["rows"]) / len(entry["rows"]),
+                "avg_vm_steps": sum(entry["vm_steps"]) / len(entry["vm_steps"]),
+                "plan": "\n".join(plans.get(key, [])),
+            })
+        return sorted(summary, key=lambda s: s["p95_ms"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._plans.clear()
@@ -0,0 +1,144 @@
+"""SQL shared by the dashboard and the benchmark harness."""
+from datetime import timedelta
+
+# ---------------- Listings / contacts grids ----------------
+LISTING_COLUMNS = ["Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Provider_ID",
+                   "Provider_Type", "Location", "Food_Type", "Meal_Type"]
+LISTING_SORT_KEYS = [("Expiry_Date", "ASC"), ("Quantity", "DESC"), ("Food_ID", "ASC")]
+# Sidebar filter -> food_listings column
+LISTING_FILTER_COLUMNS = ["Location", "Provider_Type", "Food_Type", "Meal_Type"]
+
+CONTACT_COLUMNS = ["Provider_ID", "Name", "Type", "Address", "City", "Contact"]
+CONTACT_SORT_KEYS = [("Name", "ASC"), ("Provider_ID", "ASC")]
+
+# ---------------- Quick Analytics ----------------
+QUICK_ANALYTICS = {
+    "Total Quantity Available":
+        "SELECT SUM(Quantity) as total FROM food_listings WHERE Expiry_Date >= date('now');",
+    "Claim Status Counts":
+        "SELECT Status, COUNT(*) as cnt FROM claims GROUP BY Status;",
+    "Top City by Listings":
+        "SELECT Location, COUNT(*) as cnt FROM food_listings GROUP BY Location ORDER BY cnt DESC LIMIT 1;",
+}
+
+# ---------------- Claims over time ----------------
+# Granularity -> (rollup table, expression for the period a Bucket falls in);
+# weeks start on Monday and are grouped from the daily rollup
+CLAIM_SERIES_GRANULARITIES = {
+    "Hour": ("claim_hourly_stats", "Bucket"),
+    "Day": ("claim_daily_stats", "Bucket"),
+    "Week": ("claim_daily_stats", "date(Bucket, '-6 days', 'weekday 1')"),
+}
+
+
+def claim_series_query(granularity, start=None, end=None, city=None, food_type=None):
+    """(sql, params) for claims / completion rate / lead time per period.
+
+    start and end are inclusive dates; None means unbounded, likewise
+    city and food_type mean "all".
+    """
+    table, period = CLAIM_SERIES_GRANULARITIES[granularity]
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("Bucket >= ?")
+        params.append(start.isoformat())
+    if end is not None:
+        clauses.append("Bucket < ?")
+        params.append((end + timedelta(days=1)).isoformat())
+    for column, value in (("City", city), ("Food_Type", food_type)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = f"""SELECT {period} AS Period,
+                     SUM(claims) AS claims,
+                     SUM(completed_claims) AS completed_claims,
+                     ROUND(1.0 * SUM(completed_claims) / SUM(claims), 4) AS completion_rate,
+                     ROUND(SUM(lead_days_sum) / SUM(claims), 2) AS avg_days_before_expiry
+              FROM {table}
+              {where}
+              GROUP BY Period
+              HAVING SUM(claims) > 0
+              ORDER BY Period;"""
+    return sql, params
+
+
+# ---------------- Predefined Queries ----------------
+DEFAULT_REPORT_CITY = "Mumbai"
+
+# query_map entries that can also run for any city: name -> SQL taking the city as its only parameter
+CITY_QUERIES = {
+    "Provider Contacts by City":
+        "SELECT Name, Type, Address, City, Contact FROM providers WHERE City = ? ORDER BY Name;",
+}
+
+query_map = {
+    "Providers per City":
+        "SELECT City, COUNT(*) AS provider_count FROM providers GROUP BY City ORDER BY provider_count DESC, City;",
+    "Receivers per City":
+        "SELECT City, COUNT(*) AS receiver_count FROM receivers GROUP BY City ORDER BY receiver_count DESC, City;",
+    "Top Contributing Provider Type":
+        "SELECT Provider_Type, SUM(Quantity) AS total_quantity FROM food_listings GROUP BY Provider_Type ORDER BY total_quantity DESC;",
+    "Provider Contacts by City":
+        f"SELECT Name, Type, Address, City, Contact FROM providers WHERE City = '{DEFAULT_REPORT_CITY}' ORDER BY Name;",
+    "Top Receivers by Completed Claims":
+        """SELECT r.Receiver_ID, r.Name, r.Type, r.City,
+                  s.total_claims, s.completed_claims
+           FROM receiver_claim_stats s
+           JOIN receivers r ON r.Receiver_ID = s.Receiver_ID
+           WHERE s.total_claims > 0
+           ORDER BY s.completed_claims DESC, s.total_claims DESC
+           LIMIT 10;""",
+    "Total Quantity Available":
+        "SELECT SUM(Quantity) AS total_available_quantity FROM food_listings WHERE Expiry_Date >= date('now');",
+    "City with Most Listings":
+        "SELECT Location AS City, COUNT(*) AS listing_count FROM food_listings GROUP BY Location ORDER BY listing_count DESC, City;",
+    "Most Common Food Types":
+        "SELECT Food_Type, COUNT(*) AS items_count FROM food_listings GROUP BY Food_Type ORDER BY items_count DESC;",
+    "Claims per Food Item":
+        "SELECT Food_ID, COUNT(*) AS claim_count FROM claims GROUP BY Food_ID ORDER BY claim_count DESC, Food_ID LIMIT 20;",
+    "Provider with Most Successful Claims":
+        """SELECT p.Provider_ID, p.Name, p.Type, p.City, s.successful_claims
+           FROM provider_claim_stats s
+           JOIN providers p ON p.Provider_ID = s.Provider_ID
+           WHERE s.successful_claims > 0
+           ORDER BY s.successful_claims DESC
+           LIMIT 10;""",
+    "Claim Status Distribution":
+        """SELECT Status, COUNT(*) AS count,
+                  ROUND(100.0 * COUNT(*) / (SELECT COUNT(*) FROM claims), 2) AS percentage
+           FROM claims
+           GROUP BY Status
+           ORDER BY count DESC;""",
+    "Average Quantity Claimed per Receiver":
+        """SELECT r.Receiver_ID, r.Name,
+                  ROUND(1.0 * s.completed_quantity / s.completed_claims, 2) AS avg_quantity_per_claim
+           FROM receiver_claim_stats s
+           JOIN receivers r ON r.Receiver_ID = s.Receiver_ID
+           WHERE s.completed_claims > 0
+           ORDER BY avg_quantity_per_claim DESC
+           LIMIT 15;""",
+    "Most Claimed Meal Type":
+        """SELECT Meal_Type, completed_claims
+           FROM meal_claim_stats
+           WHERE completed_claims > 0
+           ORDER BY completed_claims DESC;""",
+    "Total Quantity Donated by Provider":
+        """SELECT p.Provider_ID, p.Name, SUM(f.Quantity) AS total_quantity_donated
+           FROM providers p
+           JOIN food_listings f ON f.Provider_ID = p.Provider_ID
+           GROUP BY p.Provider_ID, p.Name
+           ORDER BY total_quantity_donated DESC
+           LIMIT 20;""",
+    "Listings Expiring Soon":
+        """SELECT Food_ID, Food_Name, Quantity, Expiry_Date, Location, Food_Type, Meal_Type
+           FROM food_listings
+           WHERE Expiry_Date BETWEEN date('now') AND date('now','+2 day')
+           ORDER BY Expiry_Date, Quantity DESC;""",
+    "Top Cities by Completed Claims":
+        """SELECT City, completed_claims
+           FROM city_claim_stats
+           WHERE completed_claims > 0
+           ORDER BY completed_claims DESC
+           LIMIT 10;"""
+}
@@ -0,0 +1,132 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from rollups import ROLLUP_TABLES
+
+# ====== Cache settings ======
+DEFAULT_TTL_S = 60
+DEFAULT_MAX_ENTRIES = 256
+
+# A write to a table can also change rows in these tables (ON DELETE CASCADE,
+# the rollup triggers and the search index triggers)
+TABLE_DEPENDENTS = {
+    "providers": ("food_listings", "claims", "search_index") + ROLLUP_TABLES,
+    "receivers": ("claims", "search_index") + ROLLUP_TABLES,
+    "food_listings": ("claims", "search_index") + ROLLUP_TABLES,
+    "claims": ROLLUP_TABLES,
+}
+
+_READ_TABLES = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][\w.]*)", re.IGNORECASE)
+_WRITE_TABLE = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+([A-Za-z_][\w.]*)",
+    re.IGNORECASE,
+)
+
+
+def tables_read(sql):
+    """Lower-cased names of the tables a SELECT reads from"""
+    return {name.split(".")[-1].lower() for name in _READ_TABLES.findall(sql)}
+
+
+def table_written(sql):
+    """Lower-cased name of the table an INSERT/UPDATE/DELETE targets, or None"""
+    match = _WRITE_TABLE.match(sql)
+    return match.group(1).split(".")[-1].lower() if match else None
+
+
+class QueryCache:
+    """LRU + TTL cache of query results keyed on (SQL, params).
+
+    Every entry remembers the version of each table it read. Writes bump the
+    versions of the tables they touch, so a cached result is dropped as soon
+    as any of its tables changes, while untouched results stay valid until
+    their TTL runs out. The TTL only matters for writes made outside the app
+    (e.g. the CSV loader).
+
+    Cached values are shared between sessions and must not be mutated.
+    """
+
+    def __init__(self, ttl_s=DEFAULT_TTL_S, max_entries=DEFAULT_MAX_ENTRIES, dependents=None):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.dependents = TABLE_DEPENDENTS if dependents is None else dependents
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def _key(sql, params):
+        return sql, tuple(params or ())
+
+    def _snapshot(self, tables):
+        return {t: self._versions.get(t, 0) for t in tables}
+
+    def get(self, sql, params=None):
+        """Return (True, value) for a fresh entry, else (False, None)"""
+        key = self._key(sql, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, versions = entry
+                if expires_at > time.monotonic() and versions == self._snapshot(versions):
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return True, value
+                del self._entries[key]
+            self._stats["misses"] += 1
+            return False, None
+
+    def put(self, sql, params, value, versions):
+        key = self._key(sql, params)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_s, versions)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def cached(self, sql, params, load):
+        """Return the cached result for (sql, params), calling load() on a miss"""
+        hit, value = self.get(sql, params)
+        if hit:
+            return value
+        # Take the versions before running the query: a write that lands
+        # while it runs makes this entry stale instead of wrongly fresh.
+        with self._lock:
+            versions = self._snapshot(tables_read(sql))
+        value = load()
+        self.put(sql, params, value, versions)
+        return value
+
+    def versions(self, tables):
+        """Current write version of each table, e.g. for other derived copies"""
+        with self._lock:
+            return self._snapshot(tables)
+
+    def bump(self, tables):
+        """Invalidate every cached result that read any of these tables"""
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            self._stats["invalidations"] += 1
+
+    def invalidate_for(self, sql):
+        """Bump the table written by sql plus the tables that depend on it"""
+        table = table_written(sql)
+        if table is None:
+            self.clear()
+            return
+        self.bump((table,) + tuple(self.dependents.get(table, ())))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), max_entries=self.max_entries,
+                        ttl_s=self.ttl_s)
@@ -0,0 +1,119 @@
+"""Run the whole pack of predefined reports in parallel.
+
+Each report runs as one task on a bounded thread pool and opens its own
+read-only connection (safe_sql.connect_readonly), so the pack never holds
+the dashboard's shared connections. WAL lets all of them read at once and
+sqlite3 releases the GIL while a statement runs, so the pack takes about as
+long as its slowest report instead of the sum of all of them.
+
+Besides every query_map entry, the reports in CITY_QUERIES can be added
+once per city. The results come back with per-report timings and can be
+bundled into one zip: a CSV per report plus timings.csv.
+
+Usage:
+    python report_runner.py reports.zip
+    python report_runner.py reports.zip --cities Mumbai Delhi --workers 8
+"""
+import argparse
+import io
+import os
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from export_data import file_stem
+from queries import query_map, CITY_QUERIES
+from safe_sql import connect_readonly
+
+# ====== Runner settings ======
+# One report per core, capped like the dashboard's reader pool
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+ReportTask = namedtuple("ReportTask", ["name", "sql", "params"])
+ReportResult = namedtuple("ReportResult", ["name", "df", "elapsed_s", "error"])
+
+
+def report_tasks(cities=None):
+    """Every query_map entry, then each CITY_QUERIES report once per city"""
+    tasks = [ReportTask(name, sql, []) for name, sql in query_map.items()]
+    for city in cities or []:
+        tasks += [ReportTask(f"{name} - {city}", sql, [city]) for name, sql in CITY_QUERIES.items()]
+    return tasks
+
+
+def run_report(db_file, task):
+    """One report on its own read-only connection; errors are returned, not raised"""
+    start = time.perf_counter()
+    try:
+        con = connect_readonly(db_file)
+        try:
+            df = pd.read_sql_query(task.sql, con, params=task.params)
+        finally:
+            con.close()
+        return ReportResult(task.name, df, time.perf_counter() - start, None)
+    except Exception as e:  # one broken report shouldn't sink the pack
+        return ReportResult(task.name, None, time.perf_counter() - start, str(e))
+
+
+def run_reports(db_file, tasks, max_workers=MAX_WORKERS, on_result=None):
+    """Run tasks on at most max_workers threads.
+
+    on_result(result, finished, total) is called on the calling thread as
+    each report finishes, e.g. to drive a progress bar. Returns (results in
+    task order, wall-clock seconds for the whole pack).
+    """
+    start = time.perf_counter()
+    results = [None] * len(tasks)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report") as executor:
+        futures = {executor.submit(run_report, db_file, task): i for i, task in enumerate(tasks)}
+        for finished, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if on_result is not None:
+                on_result(results[futures[future]], finished, len(tasks))
+    return results, time.perf_counter() - start
+
+
+def report_timings(results):
+    """Report, rows, seconds and error per result, slowest first"""
+    return pd.DataFrame({
+        "report": [r.name for r in results],
+        "rows": [len(r.df) if r.df is not None else None for r in results],
+        "seconds": [round(r.elapsed_s, 4) for r in results],
+        "error": [r.error or "" for r in results],
+    }).sort_values("seconds", ascending=False, kind="mergesort").reset_index(drop=True)
+
+
+def report_bundle(results):
+    """Zip archive (bytes) with one CSV per successful report plus timings.csv"""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i, result in enumerate(results, 1):
+            if result.df is not None:
+                zf.writestr(f"{i:02d}_{file_stem(result.name)}.csv", result.df.to_csv(index=False))
+        zf.writestr("timings.csv", report_timings(results).to_csv(index=False))
+    return buf.getvalue()
+
+
+if __name__ == "__main__":
+    from load_csv_to_sqlite import db_file
+
+    parser = argparse.ArgumentParser(description="Run every predefined report in parallel into one zip")
+    parser.add_argument("output", help="zip file to write")
+    parser.add_argument("--cities", nargs="*", default=[],
+                        help=f"also run {', '.join(CITY_QUERIES)} for each of these cities")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="reports run at the same time (default: %(default)s)")
+    parser.add_argument("--db", default=db_file, help="SQLite file to read")
+    args = parser.parse_args()
+
+    results, elapsed = run_reports(args.db, report_tasks(args.cities), args.workers,
+                                   on_result=lambda r, done, total: print(
+                                       f"[{done}/{total}] {r.name}: {r.error or f'{len(r.df)} rows'} "
+                                       f"in {r.elapsed_s:.3f}s"))
+    with open(args.output, "wb") as f:
+        f.write(report_bundle(results))
+    print(f"{len(results)} reports in {elapsed:.2f}s "
+          f"(sum of report times {sum(r.elapsed_s for r in results):.2f}s), written to {args.output}")
@@ -0,0 +1,247 @@
+"""Materialized claim rollups used by the predefined analysis queries.
+
+Each table holds one row per provider / receiver / city / meal type with
+running claim counts. Triggers on claims and food_listings keep them current
+as rows change, so the reports read a few hundred rollup rows instead of
+joining and grouping the whole claim history. After a bulk load the loader
+recomputes them once with rebuild_rollups() and then (re)creates the triggers.
+
+The claim_hourly_stats / claim_daily_stats time series are pre-bucketed the
+same way, per hour or day of claims.Timestamp and per listing City and
+Food_Type. Besides claim and completion counts they keep the sum of days
+left until Expiry_Date at claim time; listings carry no creation time, so
+that lead time stands in for "time from listing to claim".
+"""
+
+ROLLUP_TABLES = (
+    "provider_claim_stats",
+    "receiver_claim_stats",
+    "city_claim_stats",
+    "meal_claim_stats",
+    "claim_hourly_stats",
+    "claim_daily_stats",
+)
+
+# Time-series rollup table -> SQL expression bucketing an ISO 'YYYY-MM-DD HH:MM' timestamp
+SERIES_BUCKETS = {
+    "claim_hourly_stats": "substr({ts}, 1, 13) || ':00'",
+    "claim_daily_stats": "substr({ts}, 1, 10)",
+}
+
+rollup_schema_sql = """
+CREATE TABLE IF NOT EXISTS provider_claim_stats (
+    Provider_ID INTEGER PRIMARY KEY,
+    successful_claims INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_provider_claim_stats_successful
+    ON provider_claim_stats (successful_claims);
+
+CREATE TABLE IF NOT EXISTS receiver_claim_stats (
+    Receiver_ID INTEGER PRIMARY KEY,
+    total_claims INTEGER NOT NULL DEFAULT 0,
+    completed_claims INTEGER NOT NULL DEFAULT 0,
+    completed_quantity INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_receiver_claim_stats_completed
+    ON receiver_claim_stats (completed_claims, total_claims);
+
+CREATE TABLE IF NOT EXISTS city_claim_stats (
+    City TEXT PRIMARY KEY,
+    completed_claims INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS meal_claim_stats (
+    Meal_Type TEXT PRIMARY KEY,
+    completed_claims INTEGER NOT NULL DEFAULT 0
+);
+""" + "".join(f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    Bucket TEXT NOT NULL,
+    City TEXT NOT NULL,
+    Food_Type TEXT NOT NULL,
+    claims INTEGER NOT NULL DEFAULT 0,
+    completed_claims INTEGER NOT NULL DEFAULT 0,
+    lead_days_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (Bucket, City, Food_Type)
+) WITHOUT ROWID;
+""" for table in SERIES_BUCKETS)
+
+rebuild_rollups_sql = """
+DELETE FROM provider_claim_stats;
+DELETE FROM receiver_claim_stats;
+DELETE FROM city_claim_stats;
+DELETE FROM meal_claim_stats;
+
+INSERT INTO provider_claim_stats (Provider_ID, successful_claims)
+SELECT f.Provider_ID, COUNT(*)
+FROM claims c JOIN food_listings f ON f.Food_ID = c.Food_ID
+WHERE c.Status = 'Completed'
+GROUP BY f.Provider_ID;
+
+INSERT INTO receiver_claim_stats (Receiver_ID, total_claims, completed_claims, completed_quantity)
+SELECT c.Receiver_ID, COUNT(*),
+       SUM(c.Status = 'Completed'),
+       COALESCE(SUM(CASE WHEN c.Status = 'Completed' THEN f.Quantity END), 0)
+FROM claims c LEFT JOIN food_listings f ON f.Food_ID = c.Food_ID
+GROUP BY c.Receiver_ID;
+
+INSERT INTO city_claim_stats (City, completed_claims)
+SELECT f.Location, COUNT(*)
+FROM claims c JOIN food_listings f ON f.Food_ID = c.Food_ID
+WHERE c.Status = 'Completed'
+GROUP BY f.Location;
+
+INSERT INTO meal_claim_stats (Meal_Type, completed_claims)
+SELECT f.Meal_Type, COUNT(*)
+FROM claims c JOIN food_listings f ON f.Food_ID = c.Food_ID
+WHERE c.Status = 'Completed'
+GROUP BY f.Meal_Type;
+""" + "".join(f"""
+DELETE FROM {table};
+INSERT INTO {table} (Bucket, City, Food_Type, claims, completed_claims, lead_days_sum)
+SELECT {bucket.format(ts="c.Timestamp")}, f.Location, f.Food_Type, COUNT(*),
+       SUM(c.Status = 'Completed'),
+       TOTAL(julianday(f.Expiry_Date) - julianday(c.Timestamp))
+FROM claims c JOIN food_listings f ON f.Food_ID = c.Food_ID
+GROUP BY 1, 2, 3;
+""" for table, bucket in SERIES_BUCKETS.items())
+
+
+def _claim_delta_sql(ref, sign):
+    """Statements adding (sign='+') or removing (sign='-') one claim row.
+
+    ref is NEW or OLD. Food-dependent rollups look the listing up by
+    Food_ID; when the listing itself is being deleted it is already gone
+    here, and those parts are handled by the food_listings delete trigger.
+    """
+    completed = f"({ref}.Status = 'Completed')"
+    return f"""
+    INSERT INTO receiver_claim_stats (Receiver_ID, total_claims, completed_claims, completed_quantity)
+    SELECT {ref}.Receiver_ID, {sign}1, {sign}{completed},
+           {sign}{completed} * COALESCE((SELECT Quantity FROM food_listings WHERE Food_ID = {ref}.Food_ID), 0)
+    WHERE 1
+    ON CONFLICT (Receiver_ID) DO UPDATE SET
+        total_claims = total_claims + excluded.total_claims,
+        completed_claims = completed_claims + excluded.completed_claims,
+        completed_quantity = completed_quantity + excluded.completed_quantity;
+
+    INSERT INTO provider_claim_stats (Provider_ID, successful_claims)
+    SELECT f.Provider_ID, {sign}1 FROM food_listings f
+    WHERE f.Food_ID = {ref}.Food_ID AND {completed}
+    ON CONFLICT (Provider_ID) DO UPDATE SET successful_claims = successful_claims + excluded.successful_claims;
+
+    INSERT INTO city_claim_stats (City, completed_claims)
+    SELECT f.Location, {sign}1 FROM food_listings f
+    WHERE f.Food_ID = {ref}.Food_ID AND {completed}
+    ON CONFLICT (City) DO UPDATE SET completed_claims = completed_claims + excluded.completed_claims;
+
+    INSERT INTO meal_claim_stats (Meal_Type, completed_claims)
+    SELECT f.Meal_Type, {sign}1 FROM food_listings f
+    WHERE f.Food_ID = {ref}.Food_ID AND {completed}
+    ON CONFLICT (Meal_Type) DO UPDATE SET completed_claims = completed_claims + excluded.completed_claims;
+"""
+
+
+def _food_delta_sql(ref, sign):
+    """Statements adding/removing the food-dependent parts of a listing's completed claims"""
+    completed_count = f"(SELECT COUNT(*) FROM claims c WHERE c.Food_ID = {ref}.Food_ID AND c.Status = 'Completed')"
+    return f"""
+    UPDATE receiver_claim_stats
+    SET completed_quantity = completed_quantity {sign} {ref}.Quantity * (
+        SELECT COUNT(*) FROM claims c
+        WHERE c.Food_ID = {ref}.Food_ID AND c.Status = 'Completed'
+          AND c.Receiver_ID = receiver_claim_stats.Receiver_ID)
+    WHERE Receiver_ID IN (SELECT Receiver_ID FROM claims WHERE Food_ID = {ref}.Food_ID AND Status = 'Completed');
+
+    INSERT INTO provider_claim_stats (Provider_ID, successful_claims)
+    SELECT {ref}.Provider_ID, {sign}{completed_count} WHERE {completed_count} > 0
+    ON CONFLICT (Provider_ID) DO UPDATE SET successful_claims = successful_claims + excluded.successful_claims;
+
+    INSERT INTO city_claim_stats (City, completed_claims)
+    SELECT {ref}.Location, {sign}{completed_count} WHERE {completed_count} > 0
+    ON CONFLICT (City) DO UPDATE SET completed_claims = completed_claims + excluded.completed_claims;
+
+    INSERT INTO meal_claim_stats (Meal_Type, completed_claims)
+    SELECT {ref}.Meal_Type, {sign}{completed_count} WHERE {completed_count} > 0
+    ON CONFLICT (Meal_Type) DO UPDATE SET completed_claims = completed_claims + excluded.completed_claims;
+"""
+
+
+def _claim_series_delta_sql(ref, sign):
+    """Statements adding/removing one claim row in each time-series rollup"""
+    return "".join(f"""
+    INSERT INTO {table} (Bucket, City, Food_Type, claims, completed_claims, lead_days_sum)
+    SELECT {bucket.format(ts=f"{ref}.Timestamp")}, f.Location, f.Food_Type, {sign}1,
+           {sign}({ref}.Status = 'Completed'),
+           {sign}COALESCE(julianday(f.Expiry_Date) - julianday({ref}.Timestamp), 0)
+    FROM food_listings f WHERE f.Food_ID = {ref}.Food_ID
+    ON CONFLICT (Bucket, City, Food_Type) DO UPDATE SET
+        claims = claims + excluded.claims,
+        completed_claims = completed_claims + excluded.completed_claims,
+        lead_days_sum = lead_days_sum + excluded.lead_days_sum;
+""" for table, bucket in SERIES_BUCKETS.items())
+
+
+def _food_series_delta_sql(ref, sign):
+    """Statements adding/removing all of a listing's claims in each time-series rollup"""
+    return "".join(f"""
+    INSERT INTO {table} (Bucket, City, Food_Type, claims, completed_claims, lead_days_sum)
+    SELECT {bucket.format(ts="c.Timestamp")}, {ref}.Location, {ref}.Food_Type, {sign}COUNT(*),
+           {sign}SUM(c.Status = 'Completed'),
+           {sign}TOTAL(julianday({ref}.Expiry_Date) - julianday(c.Timestamp))
+    FROM claims c WHERE c.Food_ID = {ref}.Food_ID
+    GROUP BY 1
+    ON CONFLICT (Bucket, City, Food_Type) DO UPDATE SET
+        claims = claims + excluded.claims,
+        completed_claims = completed_claims + excluded.completed_claims,
+        lead_days_sum = lead_days_sum + excluded.lead_days_sum;
+""" for table, bucket in SERIES_BUCKETS.items())
+
+
+ROLLUP_TRIGGERS = {
+    "trg_rollup_claims_insert":
+        f"AFTER INSERT ON claims BEGIN {_claim_delta_sql('NEW', '+')} END",
+    "trg_rollup_claims_delete":
+        f"AFTER DELETE ON claims BEGIN {_claim_delta_sql('OLD', '-')} END",
+    "trg_rollup_claims_update":
+        f"AFTER UPDATE OF Food_ID, Receiver_ID, Status ON claims "
+        f"BEGIN {_claim_delta_sql('OLD', '-')} {_claim_delta_sql('NEW', '+')} END",
+    # Runs before ON DELETE CASCADE removes the listing's claims
+    "trg_rollup_food_delete":
+        f"BEFORE DELETE ON food_listings BEGIN {_food_delta_sql('OLD', '-')} END",
+    "trg_rollup_food_update":
+        f"AFTER UPDATE OF Quantity, Provider_ID, Location, Meal_Type ON food_listings "
+        f"BEGIN {_food_delta_sql('OLD', '-')} {_food_delta_sql('NEW', '+')} END",
+    # Time series: Timestamp and Expiry_Date also move rows between buckets / lead times
+    "trg_series_claims_insert":
+        f"AFTER INSERT ON claims BEGIN {_claim_series_delta_sql('NEW', '+')} END",
+    "trg_series_claims_delete":
+        f"AFTER DELETE ON claims BEGIN {_claim_series_delta_sql('OLD', '-')} END",
+    "trg_series_claims_update":
+        f"AFTER UPDATE OF Food_ID, Status, Timestamp ON claims "
+        f"BEGIN {_claim_series_delta_sql('OLD', '-')} {_claim_series_delta_sql('NEW', '+')} END",
+    "trg_series_food_delete":
+        f"BEFORE DELETE ON food_listings BEGIN {_food_series_delta_sql('OLD', '-')} END",
+    "trg_series_food_update":
+        f"AFTER UPDATE OF Location, Food_Type, Expiry_Date ON food_listings "
+        f"BEGIN {_food_series_delta_sql('OLD', '-')} {_food_series_delta_sql('NEW', '+')} END",
+}
+
+
+def create_rollup_tables(cur):
+    cur.executescript(rollup_schema_sql)
+
+
+def create_rollup_triggers(cur):
+    for name, body in ROLLUP_TRIGGERS.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body};")
+
+
+def drop_rollup_triggers(cur):
+    for name in ROLLUP_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {name};")
+
+
+def rebuild_rollups(cur):
+    """Recompute every rollup from scratch (used after bulk loads)"""
+    cur.executescript(f"BEGIN; {rebuild_rollups_sql} COMMIT;")
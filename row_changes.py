@@ -0,0 +1,77 @@
+"""Log of changed rows in the base tables, for in-memory copies that refresh by delta.
+
+Triggers on providers, receivers, food_listings and claims append the rowid
+of every inserted, updated or deleted row to row_changes, whichever path
+made the write (dashboard CRUD, bulk operations, cascades, other processes,
+the incremental loader). A reader that remembers the last Change_ID it has
+applied re-reads just the rows logged after it (see snapshot.py).
+
+Several readers (one per server process) may follow the log, so none of
+them deletes what it has read. prune_row_changes() keeps the newest
+ROW_CHANGES_KEEP entries instead; a reader that fell behind the pruned
+range, or meets the NULL Row_ID a full rebuild by the loader queues, loads
+from scratch.
+"""
+
+# ====== Change log settings ======
+ROW_CHANGES_TABLES = ["providers", "receivers", "food_listings", "claims"]
+# Entries kept by prune_row_changes(); pruning starts at twice as many
+ROW_CHANGES_KEEP = 100_000
+
+# AUTOINCREMENT: readers follow Change_ID > last applied, so IDs must never
+# be reused. Table_Name NULL with Row_ID NULL marks a rebuild of every table.
+row_changes_schema_sql = """
+CREATE TABLE IF NOT EXISTS row_changes (
+    Change_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Table_Name TEXT,
+    Row_ID INTEGER
+);
+"""
+
+
+def _log_sql(table, *refs):
+    return ("INSERT INTO row_changes (Table_Name, Row_ID) "
+            + " UNION ".join(f"SELECT '{table}', {ref}.rowid" for ref in refs) + ";")
+
+
+ROW_CHANGES_TRIGGERS = {
+    f"trg_row_changes_{table}_{event}": f"AFTER {event.upper()} ON {table} BEGIN {_log_sql(table, *refs)} END"
+    for table in ROW_CHANGES_TABLES
+    for event, refs in (("insert", ("NEW",)), ("delete", ("OLD",)), ("update", ("OLD", "NEW")))
+}
+
+change_range_sql = "SELECT MIN(Change_ID), MAX(Change_ID) FROM row_changes;"
+
+# Rows of one table changed in (after, upto]; a NULL Row_ID asks for a full reload
+changed_rows_sql = """
+SELECT DISTINCT Row_ID FROM row_changes
+WHERE Change_ID > ? AND Change_ID <= ? AND (Table_Name = ? OR Table_Name IS NULL);
+"""
+
+
+def create_row_changes_table(cur):
+    cur.executescript(row_changes_schema_sql)
+
+
+def create_row_changes_triggers(cur):
+    for name, body in ROW_CHANGES_TRIGGERS.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body};")
+
+
+def drop_row_changes_triggers(cur):
+    for name in ROW_CHANGES_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {name};")
+
+
+def reset_row_changes(cur):
+    """Empty the log and ask every reader to reload (after bulk loads)"""
+    cur.executescript("BEGIN; DELETE FROM row_changes; "
+                      "INSERT INTO row_changes (Table_Name, Row_ID) VALUES (NULL, NULL); COMMIT;")
+
+
+def prune_row_changes(con, keep=ROW_CHANGES_KEEP):
+    """Delete all but the newest keep entries once there are twice as many; returns rows deleted"""
+    low, high = con.execute(change_range_sql).fetchone()
+    if high is None or high - low < 2 * keep:
+        return 0
+    return con.execute("DELETE FROM row_changes WHERE Change_ID <= ?;", [high - keep]).rowcount
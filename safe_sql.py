@@ -0,0 +1,88 @@
+"""Resource-bounded runner for the dashboard's "Run Custom SQL" box.
+
+Every statement runs on its own read-only connection (mode=ro URI plus
+query_only, with ATTACH denied so it can't reach or create other files),
+is cancelled by a progress handler once it passes a wall-clock deadline,
+and is streamed with fetchmany up to a row cap. A runaway query
+therefore costs at most timeout_s of one core and max_rows of memory, and
+never holds the shared app connections.
+"""
+import sqlite3
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import pandas as pd
+
+# ====== Limits ======
+DEFAULT_TIMEOUT_S = 5.0
+DEFAULT_MAX_ROWS = 10_000
+FETCH_BATCH = 500
+# The progress handler runs every this many SQLite VM instructions
+PROGRESS_STEPS = 10_000
+
+SafeResult = namedtuple("SafeResult", ["df", "truncated", "elapsed_s", "plan"])
+
+
+class QueryTimeout(Exception):
+    pass
+
+
+def _deny_attach(action, *_):
+    # mode=ro only covers the main file: ATTACH (and VACUUM INTO, which
+    # attaches its target) could still create or read any other DB file
+    if action in (sqlite3.SQLITE_ATTACH, sqlite3.SQLITE_DETACH):
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK
+
+
+def connect_readonly(db_file):
+    uri = Path(db_file).resolve().as_uri() + "?mode=ro"
+    con = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    con.execute("PRAGMA query_only = ON;")
+    con.set_authorizer(_deny_attach)
+    return con
+
+
+def explain_plan(con, sql, params=()):
+    """EXPLAIN QUERY PLAN as a DataFrame, with details indented by tree depth"""
+    rows = con.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    depth = {0: -1}
+    details = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        details.append("  " * depth[node_id] + detail)
+    return pd.DataFrame({"id": [r[0] for r in rows], "parent": [r[1] for r in rows], "detail": details})
+
+
+def run_readonly_query(db_file, sql, params=(), timeout_s=DEFAULT_TIMEOUT_S, max_rows=DEFAULT_MAX_ROWS):
+    """Run one statement with a timeout and a row cap.
+
+    Returns SafeResult(df, truncated, elapsed_s, plan). Raises QueryTimeout
+    when the deadline passes, sqlite3.Error for invalid or write statements.
+    """
+    con = connect_readonly(db_file)
+    start = time.monotonic()
+    deadline = start + timeout_s
+    con.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, PROGRESS_STEPS)
+    try:
+        plan = explain_plan(con, sql, params)
+        cur = con.execute(sql, params)
+        columns = [d[0] for d in cur.description] if cur.description else []
+
+        rows = []
+        while len(rows) < max_rows:
+            batch = cur.fetchmany(min(FETCH_BATCH, max_rows - len(rows)))
+            if not batch:
+                break
+            rows.extend(batch)
+        truncated = len(rows) >= max_rows and cur.fetchone() is not None
+    except sqlite3.OperationalError as e:
+        if "interrupted" in str(e):
+            raise QueryTimeout(f"Query cancelled after {timeout_s:g}s") from e
+        raise
+    finally:
+        con.close()
+
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    return SafeResult(df, truncated, time.monotonic() - start, plan)
@@ -0,0 +1,151 @@
+"""FTS5 search index over providers, receivers and food listings.
+
+One search_index row per entity, kept in sync by triggers on the three
+tables and rebuilt in bulk by the loader (like the claim rollups). The
+entity is encoded in the rowid (ID * 4 + entity code), so every trigger
+touches exactly one index row by rowid.
+
+Each word of a query is matched as a prefix (one-letter words exactly).
+A word with no prefix match in the index vocabulary (search_vocab) is
+swapped for its closest vocabulary terms instead, so "Smth" still finds
+"Smith". Results are ranked with bm25, names weighing more than cities
+and addresses.
+"""
+import difflib
+import re
+
+import pandas as pd
+
+# ====== Search settings ======
+SEARCH_LIMIT = 20
+FUZZY_CUTOFF = 0.75  # difflib similarity a replacement term needs
+FUZZY_TERMS = 3      # replacement terms tried per unmatched word
+BM25_WEIGHTS = (10.0, 2.0, 5.0)  # name, address, city
+
+# entity -> (rowid code, table, ID column, name / address / city columns; None = not indexed)
+ENTITIES = {
+    "provider": (1, "providers", "Provider_ID", "Name", "Address", "City"),
+    "receiver": (2, "receivers", "Receiver_ID", "Name", None, "City"),
+    "food": (3, "food_listings", "Food_ID", "Food_Name", None, "Location"),
+}
+ENTITY_BY_CODE = {code: entity for entity, (code, *_) in ENTITIES.items()}
+
+search_schema_sql = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    name, address, city,
+    prefix = '2 3',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_vocab USING fts5vocab(search_index, 'row');
+"""
+
+SEARCH_SQL = f"""
+SELECT rowid % 4 AS entity_code, rowid / 4 AS ID, name AS Name, address AS Address, city AS City,
+       bm25(search_index, {', '.join(map(str, BM25_WEIGHTS))}) AS rank
+FROM search_index
+WHERE search_index MATCH ? AND (? IS NULL OR rowid % 4 = ?)
+ORDER BY rank
+LIMIT ?;
+"""
+
+
+def _row_values(entity, ref=None):
+    """rowid, name, address, city expressions for an entity row (ref: NEW / OLD / None)"""
+    code, _, id_col, name, address, city = ENTITIES[entity]
+    col = (lambda c: f"{ref}.{c}") if ref else (lambda c: c)
+    return [f"{col(id_col)} * 4 + {code}", col(name),
+            f"COALESCE({col(address)}, '')" if address else "''", col(city)]
+
+
+def _index_row_sql(entity, ref):
+    return f"INSERT INTO search_index (rowid, name, address, city) VALUES ({', '.join(_row_values(entity, ref))});"
+
+
+def _delete_row_sql(entity, ref):
+    return f"DELETE FROM search_index WHERE rowid = {_row_values(entity, ref)[0]};"
+
+
+def _search_triggers():
+    triggers = {}
+    for entity, (_, table, id_col, *columns) in ENTITIES.items():
+        watched = ", ".join([id_col] + [c for c in columns if c])
+        triggers[f"trg_search_{table}_insert"] = f"AFTER INSERT ON {table} BEGIN {_index_row_sql(entity, 'NEW')} END"
+        triggers[f"trg_search_{table}_delete"] = f"AFTER DELETE ON {table} BEGIN {_delete_row_sql(entity, 'OLD')} END"
+        triggers[f"trg_search_{table}_update"] = (
+            f"AFTER UPDATE OF {watched} ON {table} "
+            f"BEGIN {_delete_row_sql(entity, 'OLD')} {_index_row_sql(entity, 'NEW')} END"
+        )
+    return triggers
+
+
+SEARCH_TRIGGERS = _search_triggers()
+
+rebuild_search_sql = "DELETE FROM search_index;\n" + "".join(
+    f"INSERT INTO search_index (rowid, name, address, city) "
+    f"SELECT {', '.join(_row_values(entity))} FROM {table};\n"
+    for entity, (_, table, *_) in ENTITIES.items()
+) + "INSERT INTO search_index (search_index) VALUES ('optimize');"
+
+
+def create_search_index(cur):
+    cur.executescript(search_schema_sql)
+
+
+def create_search_triggers(cur):
+    for name, body in SEARCH_TRIGGERS.items():
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body};")
+
+
+def drop_search_triggers(cur):
+    for name in SEARCH_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {name};")
+
+
+def rebuild_search_index(cur):
+    """Re-index every row from scratch (used after bulk loads)"""
+    cur.executescript(f"BEGIN; {rebuild_search_sql} COMMIT;")
+
+
+# ====== Querying ======
+def query_words(text):
+    """Lower-cased words of a search box entry, as the unicode61 tokenizer sees them"""
+    return re.findall(r"\w+", text.lower())
+
+
+def _has_prefix(con, word):
+    return con.execute("SELECT 1 FROM search_vocab WHERE term >= ? AND term < ? LIMIT 1;",
+                       (word, word + "\U0010ffff")).fetchone() is not None
+
+
+def _close_terms(con, word):
+    """Vocabulary terms within typo distance of word (same first letter, similar length)"""
+    candidates = [row[0] for row in con.execute(
+        "SELECT term FROM search_vocab WHERE term >= ? AND term < ? AND length(term) BETWEEN ? AND ?;",
+        (word[0], chr(ord(word[0]) + 1), len(word) - 2, len(word) + 2))]
+    return difflib.get_close_matches(word, candidates, n=FUZZY_TERMS, cutoff=FUZZY_CUTOFF)
+
+
+def match_expression(con, text):
+    """FTS5 MATCH expression for text: prefix per word, close terms for unknown words.
+
+    Returns None when text has no words.
+    """
+    parts = []
+    for word in query_words(text):
+        # one-letter prefixes match most of the index, so those stay exact
+        alternatives = [f'"{word}"*' if len(word) > 1 else f'"{word}"']
+        if len(word) > 1 and not _has_prefix(con, word):
+            alternatives = [f'"{term}"' for term in _close_terms(con, word)] or alternatives
+        parts.append(f"({' OR '.join(alternatives)})")
+    return " AND ".join(parts) or None
+
+
+def search(con, text, entity=None, limit=SEARCH_LIMIT):
+    """Ranked matches as a DataFrame: Entity, ID, Name, Address, City, rank"""
+    columns = ["Entity", "ID", "Name", "Address", "City", "rank"]
+    match = match_expression(con, text)
+    if match is None:
+        return pd.DataFrame(columns=columns)
+    code = ENTITIES[entity][0] if entity else None
+    df = pd.read_sql_query(SEARCH_SQL, con, params=[match, code, code, limit])
+    return df.assign(Entity=df["entity_code"].map(ENTITY_BY_CODE))[columns]
@@ -0,0 +1,297 @@
+"""In-memory columnar snapshot of the four tables for analytics.
+
+Every analytics round-trip through pd.read_sql_query turns SQLite rows into
+Python objects and back into a DataFrame. The snapshot loads each table once
+into compact columns instead:
+
+* low-cardinality text columns are dictionary-encoded as categoricals
+  (integer codes + one copy of each distinct string);
+* integer columns are downcast, ISO date/timestamp text becomes datetime64.
+
+A table is refreshed only when its write version (QueryCache.versions) has
+moved on since it was read, or after max_age_s (the query cache's TTL) to
+pick up writes made outside the app. A refresh re-reads just the rows logged
+in row_changes since then and splices them in; a table is loaded from
+scratch on first use, after a rebuild by the loader, or when more than
+DELTA_MAX_FRACTION of it changed. SNAPSHOT_QUICK_ANALYTICS and
+SNAPSHOT_QUERIES re-implement the Quick Analytics metrics and the plain
+query_map aggregates as vectorized pandas group-bys with the same result
+columns and ordering as their SQL.
+"""
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from load_csv_to_sqlite import ISO_DATE_FORMAT, ISO_TIMESTAMP_FORMAT
+from query_cache import DEFAULT_TTL_S
+from row_changes import ROW_CHANGES_KEEP, change_range_sql, changed_rows_sql, prune_row_changes
+
+# ====== Snapshot settings ======
+DEFAULT_MAX_AGE_S = DEFAULT_TTL_S
+# Changed rows, as a share of the table, above which a full reload is cheaper
+DELTA_MAX_FRACTION = 0.25
+
+# Only what the analytics below use: free-text Address / Contact stay in SQLite
+SNAPSHOT_COLUMNS = {
+    "providers": ["Provider_ID", "Name", "Type", "City"],
+    "receivers": ["Receiver_ID", "Name", "Type", "City"],
+    "food_listings": ["Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Provider_ID",
+                      "Provider_Type", "Location", "Food_Type", "Meal_Type"],
+    "claims": ["Claim_ID", "Food_ID", "Receiver_ID", "Status", "Timestamp"],
+}
+CATEGORICAL_COLUMNS = {
+    "providers": ["Type", "City"],
+    "receivers": ["Type", "City"],
+    "food_listings": ["Provider_Type", "Location", "Food_Type", "Meal_Type", "Food_Name"],
+    "claims": ["Status"],
+}
+DATETIME_COLUMNS = {
+    "food_listings": {"Expiry_Date": ISO_DATE_FORMAT},
+    "claims": {"Timestamp": ISO_TIMESTAMP_FORMAT},
+}
+INTEGER_COLUMNS = {
+    "providers": ["Provider_ID"],
+    "receivers": ["Receiver_ID"],
+    "food_listings": ["Food_ID", "Quantity", "Provider_ID"],
+    "claims": ["Claim_ID", "Food_ID", "Receiver_ID"],
+}
+
+
+def encode_table(table, df):
+    """Categoricals, downcast integers and datetimes for one table's frame"""
+    encoded = {}
+    for column in CATEGORICAL_COLUMNS.get(table, []):
+        encoded[column] = df[column].astype("category")
+    for column in INTEGER_COLUMNS.get(table, []):
+        encoded[column] = pd.to_numeric(df[column], downcast="integer")
+    for column, fmt in DATETIME_COLUMNS.get(table, {}).items():
+        encoded[column] = pd.to_datetime(df[column], format=fmt, errors="coerce")
+    return df.assign(**encoded)
+
+
+def splice_rows(df, changed, fresh):
+    """df with the rows at index labels changed replaced by fresh (deleted rows simply drop out).
+
+    Both frames come from encode_table(); categoricals end up with the sorted,
+    used categories a full load would have, so group-bys keep their order.
+    """
+    kept = df.drop(index=changed, errors="ignore")
+    for column in kept.columns:
+        if isinstance(kept[column].dtype, pd.CategoricalDtype):
+            categories = kept[column].cat.categories.union(fresh[column].cat.categories)
+            kept[column] = kept[column].cat.set_categories(categories)
+            fresh[column] = fresh[column].cat.set_categories(categories)
+    spliced = pd.concat([kept, fresh]).sort_index()
+    for column in spliced.select_dtypes("category"):
+        spliced[column] = spliced[column].cat.remove_unused_categories()
+    return spliced
+
+
+class ColumnarSnapshot:
+    """Lazily loaded, version-checked columnar copies of the base tables.
+
+    versions is a callable mapping table names to their current write
+    versions (QueryCache.versions); without it tables only refresh on age.
+    Frames are indexed by rowid so logged changes can be spliced in.
+    """
+
+    def __init__(self, pool, versions=None, max_age_s=DEFAULT_MAX_AGE_S):
+        self.pool = pool
+        self.versions = versions
+        self.max_age_s = max_age_s
+        self._lock = threading.Lock()
+        self._tables = {}  # table -> (DataFrame, version, loaded_at, last Change_ID applied)
+        self._stats = {"loads": 0, "load_s": 0.0, "delta_refreshes": 0, "delta_rows": 0, "delta_s": 0.0}
+
+    def _current_version(self, table):
+        return self.versions([table])[table] if self.versions else 0
+
+    def _read(self, con, table, where="", params=()):
+        columns = ", ".join(SNAPSHOT_COLUMNS[table])
+        df = pd.read_sql_query(f"SELECT rowid AS _rowid, {columns} FROM {table} {where};", con,
+                               params=params, index_col="_rowid")
+        return encode_table(table, df)
+
+    def _load(self, table):
+        """(frame, last Change_ID it reflects) from a full read; None when the DB has no row_changes"""
+        start = time.perf_counter()
+        with self.pool.reader() as con:
+            # Changes up to here are reflected in the read that follows
+            last_change = self._last_change(con)
+            df = self._read(con, table)
+        self._stats["loads"] += 1
+        self._stats["load_s"] += time.perf_counter() - start
+        return df, last_change
+
+    @staticmethod
+    def _last_change(con):
+        try:
+            return con.execute(change_range_sql).fetchone()[1] or 0
+        except sqlite3.OperationalError:  # DB from before the change log
+            return None
+
+    def _refresh(self, table, df, last_change):
+        """(frame, last Change_ID) with the rows changed since last_change re-read, or None to reload"""
+        start = time.perf_counter()
+        with self.pool.reader() as con:
+            low, high = con.execute(change_range_sql).fetchone()
+            if high is None or high == last_change:
+                return df, last_change
+            if low > last_change + 1:  # pruned past what this frame has seen
+                return None
+            changed = [row_id for row_id, in con.execute(changed_rows_sql, [last_change, high, table])]
+            if None in changed or len(changed) > DELTA_MAX_FRACTION * len(df):
+                return None
+            fresh = self._read(con, table, "WHERE rowid IN (SELECT value FROM json_each(?))",
+                               [json.dumps(changed)])
+        if high - low >= 2 * ROW_CHANGES_KEEP:
+            with self.pool.writer() as con:
+                prune_row_changes(con)
+        self._stats["delta_refreshes"] += 1
+        self._stats["delta_rows"] += len(changed)
+        self._stats["delta_s"] += time.perf_counter() - start
+        return splice_rows(df, changed, fresh), high
+
+    def table(self, table):
+        """The current frame for table, refreshing it first if it is stale"""
+        with self._lock:
+            # Read the version before refreshing: a write that lands during
+            # the refresh leaves the entry stale rather than wrongly current.
+            version = self._current_version(table)
+            entry = self._tables.get(table)
+            refreshed = None
+            if entry is not None:
+                df, loaded_version, loaded_at, last_change = entry
+                if loaded_version == version and time.monotonic() - loaded_at < self.max_age_s:
+                    return df
+                if last_change is not None:
+                    refreshed = self._refresh(table, df, last_change)
+            df, last_change = refreshed or self._load(table)
+            self._tables[table] = (df, version, time.monotonic(), last_change)
+            return df
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+
+    def stats(self):
+        with self._lock:
+            tables = {name: {"rows": len(df), "memory_bytes": int(df.memory_usage(deep=True).sum()),
+                             "age_s": time.monotonic() - loaded_at}
+                      for name, (df, _, loaded_at, _) in self._tables.items()}
+            return dict(self._stats, tables=tables)
+
+
+# ====== Vectorized analytics ======
+def _today():
+    # date('now') in SQLite is UTC
+    return pd.Timestamp(datetime.now(timezone.utc).date())
+
+
+def _counts(df, column, count_name):
+    """COUNT(*) per value of column, in column order, like GROUP BY"""
+    return (df.groupby(column, observed=True, sort=True).size()
+            .rename(count_name).reset_index())
+
+
+def _by_count_then_key(df, count_name, key):
+    # Ties ordered by key ascending; mergesort keeps it stable
+    return df.sort_values([count_name, key], ascending=[False, True], kind="mergesort").reset_index(drop=True)
+
+
+def total_quantity_available(snap, name="total"):
+    food = snap.table("food_listings")
+    available = food["Quantity"][food["Expiry_Date"] >= _today()]
+    return pd.DataFrame({name: [int(available.sum()) if len(available) else None]})
+
+
+def claim_status_counts(snap):
+    return _counts(snap.table("claims"), "Status", "cnt")
+
+
+def top_city_by_listings(snap):
+    counts = _counts(snap.table("food_listings"), "Location", "cnt")
+    return counts.sort_values("cnt", ascending=False, kind="mergesort").head(1).reset_index(drop=True)
+
+
+def providers_per_city(snap):
+    return _by_count_then_key(_counts(snap.table("providers"), "City", "provider_count"),
+                              "provider_count", "City")
+
+
+def receivers_per_city(snap):
+    return _by_count_then_key(_counts(snap.table("receivers"), "City", "receiver_count"),
+                              "receiver_count", "City")
+
+
+def top_provider_type(snap):
+    food = snap.table("food_listings")
+    totals = (food.groupby("Provider_Type", observed=True)["Quantity"].sum()
+              .rename("total_quantity").reset_index())
+    return totals.sort_values("total_quantity", ascending=False, kind="mergesort").reset_index(drop=True)
+
+
+def city_with_most_listings(snap):
+    counts = _counts(snap.table("food_listings"), "Location", "listing_count").rename(columns={"Location": "City"})
+    return _by_count_then_key(counts, "listing_count", "City")
+
+
+def most_common_food_types(snap):
+    counts = _counts(snap.table("food_listings"), "Food_Type", "items_count")
+    return counts.sort_values("items_count", ascending=False, kind="mergesort").reset_index(drop=True)
+
+
+def claims_per_food_item(snap):
+    counts = _counts(snap.table("claims"), "Food_ID", "claim_count")
+    return _by_count_then_key(counts, "claim_count", "Food_ID").head(20)
+
+
+def claim_status_distribution(snap):
+    counts = _counts(snap.table("claims"), "Status", "count")
+    counts["percentage"] = (100.0 * counts["count"] / counts["count"].sum()).round(2)
+    return counts.sort_values("count", ascending=False, kind="mergesort").reset_index(drop=True)
+
+
+def quantity_donated_by_provider(snap):
+    totals = (snap.table("food_listings").groupby("Provider_ID")["Quantity"].sum()
+              .rename("total_quantity_donated").reset_index())
+    providers = snap.table("providers")[["Provider_ID", "Name"]]
+    donated = providers.merge(totals, on="Provider_ID")
+    return donated.sort_values("total_quantity_donated", ascending=False,
+                               kind="mergesort").head(20).reset_index(drop=True)
+
+
+def listings_expiring_soon(snap):
+    food = snap.table("food_listings")
+    today = _today()
+    soon = food[food["Expiry_Date"].between(today, today + timedelta(days=2))]
+    soon = soon.sort_values(["Expiry_Date", "Quantity"], ascending=[True, False], kind="mergesort")
+    return soon.assign(Expiry_Date=soon["Expiry_Date"].dt.strftime(ISO_DATE_FORMAT))[
+        ["Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Location", "Food_Type", "Meal_Type"]
+    ].reset_index(drop=True)
+
+
+# Keyed like QUICK_ANALYTICS / query_map; query_map entries over the rollup
+# tables are already cheap and stay on SQL
+SNAPSHOT_QUICK_ANALYTICS = {
+    "Total Quantity Available": total_quantity_available,
+    "Claim Status Counts": claim_status_counts,
+    "Top City by Listings": top_city_by_listings,
+}
+
+SNAPSHOT_QUERIES = {
+    "Providers per City": providers_per_city,
+    "Receivers per City": receivers_per_city,
+    "Top Contributing Provider Type": top_provider_type,
+    "Total Quantity Available": lambda snap: total_quantity_available(snap, "total_available_quantity"),
+    "City with Most Listings": city_with_most_listings,
+    "Most Common Food Types": most_common_food_types,
+    "Claims per Food Item": claims_per_food_item,
+    "Claim Status Distribution": claim_status_distribution,
+    "Total Quantity Donated by Provider": quantity_donated_by_provider,
+    "Listings Expiring Soon": listings_expiring_soon,
+}
@@ -0,0 +1,67 @@
+"""Startup phase for the dashboard.
+
+The schema version is checked once per server process and, when the DB is
+missing or on an older SCHEMA_VERSION, build_db() builds it from the CSVs
+or migrates it in place (keeping rows entered through the app) in a
+background thread so the page can paint a loading state meanwhile. The
+loader, and with it pandas, is imported on that thread as well, which keeps
+both off the path to the first paint.
+"""
+import os
+import threading
+import time
+
+
+class DatabaseBootstrap:
+    """One-shot check-and-build of the dashboard DB on a background thread.
+
+    After wait() returns True, db_file holds the DB path, or error the
+    exception that stopped the build. action is "ready", "build" or
+    "migrate"; timings has the seconds spent in each step.
+    """
+
+    def __init__(self):
+        self.db_file = None
+        self.error = None
+        self.action = None
+        self.timings = {}
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="db-bootstrap", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            start = time.perf_counter()
+            from load_csv_to_sqlite import build_db, db_file, schema_version, SCHEMA_VERSION
+            self.timings["import_s"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            if not os.path.exists(db_file):
+                self.action = "build"
+            elif schema_version(db_file) != SCHEMA_VERSION:
+                self.action = "migrate"
+            else:
+                self.action = "ready"
+            self.timings["check_s"] = time.perf_counter() - start
+
+            if self.action != "ready":
+                start = time.perf_counter()
+                build_db()  # builds a missing DB, migrates an older one in place
+                self.timings["build_s"] = time.perf_counter() - start
+            self.db_file = db_file
+        except Exception as e:  # surfaced by the app instead of dying with the thread
+            self.error = e
+        finally:
+            self._done.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the bootstrap finished or timeout passed; True if finished"""
+        return self._done.wait(timeout)
@@ -0,0 +1,50 @@
+"""Tests for the batch allocation order.
+
+Run from the repo root:
+    python -m pytest -q tests
+"""
+import os
+import sys
+from datetime import date, timedelta
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from allocation import allocate, allocation_summary
+
+TODAY = date(2026, 1, 10)
+
+
+def listings(*rows):
+    """rows of (Food_ID, Quantity, days_left, Location)"""
+    return pd.DataFrame([(food_id, "Rice", qty, (TODAY + timedelta(days=days)).isoformat(), city)
+                         for food_id, qty, days, city in rows],
+                        columns=["Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Location"])
+
+
+def receivers(*cities):
+    return pd.DataFrame([(i + 1, f"R{i + 1}", city, 0, 0) for i, city in enumerate(cities)],
+                        columns=["Receiver_ID", "Name", "City", "total_claims", "completed_claims"])
+
+
+def test_large_listing_tomorrow_beats_small_one_today():
+    food = listings((1, 1, 0, "Pune"), (2, 100, 1, "Pune"))
+    proposals = allocate(food, receivers("Pune"), today=TODAY, max_per_receiver=1)
+    assert proposals["Food_ID"].tolist() == [2]
+    assert allocation_summary(food, proposals)["unallocated_quantity"] == 1
+
+
+def test_each_city_keeps_its_most_valuable_listings():
+    food = listings((1, 10, 0, "Pune"), (2, 30, 0, "Pune"), (3, 20, 2, "Pune"),
+                    (4, 5, 0, "Delhi"), (5, 50, 3, "Delhi"))
+    proposals = allocate(food, receivers("Pune", "Delhi"), today=TODAY, max_per_receiver=1,
+                         allow_cross_city=False)
+    assert sorted(proposals["Food_ID"]) == [2, 5]
+    assert proposals["same_city"].all()
+
+
+def test_cross_city_receivers_take_what_local_ones_cannot():
+    food = listings((1, 10, 0, "Pune"), (2, 30, 0, "Pune"), (3, 1, 0, "Delhi"))
+    proposals = allocate(food, receivers("Pune", "Delhi"), today=TODAY, max_per_receiver=1)
+    assert sorted(proposals["Food_ID"]) == [1, 2]
@@ -0,0 +1,93 @@
+"""Regression tests for the expiry watch change queue.
+
+Run from the repo root:
+    python -m pytest -q tests
+"""
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_pool import ConnectionPool
+from expiry_watch import (ExpiryWatch, create_expiry_watch_tables, create_expiry_watch_triggers,
+                          reset_expiry_watch)
+from load_csv_to_sqlite import schema_sql
+
+TODAY = date(2026, 1, 10)
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Three open listings in Pune, one receiver there, with the watch triggers installed"""
+    path = str(tmp_path / "watch.db")
+    con = sqlite3.connect(path, isolation_level=None)
+    con.executescript(schema_sql)
+    create_expiry_watch_tables(con.cursor())
+    create_expiry_watch_triggers(con.cursor())
+    con.execute("INSERT INTO providers VALUES (1, 'Store', 'Supermarket', 'Main St', 'Pune', NULL);")
+    con.execute("INSERT INTO receivers VALUES (1, 'Shelter', 'Shelter', 'Pune', NULL);")
+    expiry = (TODAY + timedelta(days=10)).isoformat()
+    for food_id in (1, 2, 3):
+        con.execute("INSERT INTO food_listings VALUES (?, 'Rice', 5, ?, 1, 'Supermarket', 'Pune', 'Veg', 'Lunch');",
+                    [food_id, expiry])
+    con.close()
+    return path
+
+
+def claim(db, food_id):
+    con = sqlite3.connect(db)
+    with con:
+        con.execute("INSERT INTO claims (Food_ID, Receiver_ID, Status, Timestamp) "
+                    "VALUES (?, 1, 'Pending', '2026-01-10 09:00');", [food_id])
+    con.close()
+
+
+def alerted(db):
+    con = sqlite3.connect(db)
+    rows = con.execute("SELECT Food_ID, Threshold_Days FROM expiry_alerts ORDER BY Food_ID;").fetchall()
+    con.close()
+    return rows
+
+
+def test_changes_after_the_queue_is_drained_are_applied(db):
+    today = [TODAY]
+    watch = ExpiryWatch(ConnectionPool(db), clock=lambda: today[0])
+    watch.check()
+    assert watch.stats()["tracked_listings"] == 3
+
+    claim(db, 1)
+    assert watch.apply_changes() == 1  # drains expiry_watch_changes
+    claim(db, 2)
+    assert watch.apply_changes() == 1  # a reused Change_ID would be skipped here
+    assert watch.stats()["tracked_listings"] == 1
+
+    today[0] = TODAY + timedelta(days=8)  # two days before expiry
+    assert watch.check() == 1
+    assert alerted(db) == [(3, 2)]  # the claimed listings get no alert
+
+
+def test_reload_marker_after_the_queue_is_drained_is_seen(db):
+    watch = ExpiryWatch(ConnectionPool(db), clock=lambda: TODAY)
+    watch.check()
+    claim(db, 1)
+    watch.apply_changes()
+    reloads = watch.stats()["reloads"]
+
+    con = sqlite3.connect(db, isolation_level=None)
+    reset_expiry_watch(con.cursor())  # what a full rebuild by the loader queues
+    con.close()
+    watch.apply_changes()
+    assert watch.stats()["reloads"] == reloads + 1
+
+
+def test_queue_from_older_schema_is_replaced(tmp_path):
+    con = sqlite3.connect(str(tmp_path / "old.db"))
+    con.execute("CREATE TABLE expiry_watch_changes (Change_ID INTEGER PRIMARY KEY, Food_ID INTEGER);")
+    create_expiry_watch_tables(con.cursor())
+    sql = con.execute("SELECT sql FROM sqlite_master WHERE name = 'expiry_watch_changes';").fetchone()[0]
+    assert "AUTOINCREMENT" in sql
+    con.close()
@@ -0,0 +1,75 @@
+"""Tests for the columnar snapshot's delta refresh.
+
+Run from the repo root:
+    python -m pytest -q tests
+"""
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_pool import ConnectionPool
+from load_csv_to_sqlite import schema_sql
+from row_changes import create_row_changes_table, create_row_changes_triggers, reset_row_changes
+from snapshot import ColumnarSnapshot, SNAPSHOT_COLUMNS
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Twenty listings from two providers, with the change log installed"""
+    path = str(tmp_path / "snap.db")
+    con = sqlite3.connect(path, isolation_level=None)
+    con.executescript(schema_sql)
+    create_row_changes_table(con.cursor())
+    create_row_changes_triggers(con.cursor())
+    con.execute("INSERT INTO providers VALUES (1, 'Store', 'Supermarket', 'Main St', 'Pune', NULL);")
+    con.execute("INSERT INTO providers VALUES (2, 'Cafe', 'Restaurant', 'High St', 'Delhi', NULL);")
+    for food_id in range(1, 21):
+        con.execute("INSERT INTO food_listings VALUES (?, 'Rice', ?, '2026-01-20', ?, 'Supermarket', ?, "
+                    "'Veg', 'Lunch');", [food_id, food_id, 1 + food_id % 2, ["Pune", "Delhi"][food_id % 2]])
+    con.close()
+    return path
+
+
+def write(db, *statements):
+    con = sqlite3.connect(db, isolation_level=None)
+    con.execute("PRAGMA foreign_keys = ON;")
+    for sql in statements:
+        con.execute(sql)
+    con.close()
+
+
+def assert_matches_fresh_load(snap, db):
+    fresh = ColumnarSnapshot(ConnectionPool(db))
+    for table in SNAPSHOT_COLUMNS:
+        pd.testing.assert_frame_equal(snap.table(table), fresh.table(table), check_dtype=False)
+
+
+def test_changed_rows_are_spliced_in(db):
+    snap = ColumnarSnapshot(ConnectionPool(db), max_age_s=0)
+    snap.table("food_listings")
+    write(db,
+          "INSERT INTO food_listings VALUES (21, 'Bread', 3, '2026-01-21', 2, 'Restaurant', 'Agra', "
+          "'Veg', 'Dinner');",
+          "UPDATE food_listings SET Quantity = 99, Location = 'Agra' WHERE Food_ID = 4;",
+          "UPDATE food_listings SET Food_ID = 40 WHERE Food_ID = 5;",
+          "DELETE FROM food_listings WHERE Food_ID = 6;")
+    assert_matches_fresh_load(snap, db)
+    stats = snap.stats()
+    assert stats["loads"] == 1 + 3  # food_listings once, the other tables on first use
+    assert stats["delta_refreshes"] == 1
+
+
+def test_rebuild_marker_reloads(db):
+    snap = ColumnarSnapshot(ConnectionPool(db), max_age_s=0)
+    snap.table("food_listings")
+    con = sqlite3.connect(db, isolation_level=None)
+    reset_row_changes(con.cursor())  # what a full rebuild by the loader queues
+    con.close()
+    snap.table("food_listings")
+    assert snap.stats()["loads"] == 2
+    assert snap.stats()["delta_refreshes"] == 0